@@ -26,6 +26,17 @@ class Settings(BaseSettings):
     # Google Cloud Configuration
     google_application_credentials: Optional[str] = None
     
+    # Largest JSON form field (in characters) accepted by the analysis endpoints
+    max_form_json_length: int = 256 * 1024
+    
+    # Upload limits for the image analysis endpoints
+    max_image_bytes: int = 25 * 1024 * 1024
+    max_batch_bytes: int = 200 * 1024 * 1024
+    
+    # Concurrent AI calls: across the analysis endpoints, and per vision provider
+    ai_max_inflight: int = 8
+    ai_provider_max_inflight: int = 4
+    
     class Config:
         env_file = ".env"
         env_file_encoding = 'utf-8'
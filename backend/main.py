@@ -1,5 +1,6 @@
 from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from langchain_ollama import OllamaLLM
 from langchain.prompts import PromptTemplate
@@ -16,11 +17,12 @@ except ImportError:
     vision = None
 
 # Import routers
-from routers.pre_estimate import router as pre_estimate_router
+from routers.pre_estimate import router as pre_estimate_router, shutdown_pdf_pool, flush_pending_auto_saves
 from routers.material_analysis import router as material_analysis_router
 from routers.demo_analysis import router as demo_analysis_router
-from routers.rag_demo_analysis import router as rag_demo_analysis_router
+from routers.rag_demo_analysis import router as rag_demo_analysis_router, shutdown_image_pool, flush_pending_stores
 from models.database import init_database
+from services.ai_service import ai_service
 
 # Import our custom logger
 from utils.logger import logger
@@ -38,12 +40,18 @@ async def lifespan(app: FastAPI):
     init_database()
     yield
     # Shutdown
+    await flush_pending_auto_saves()
+    await flush_pending_stores()
+    shutdown_pdf_pool()
+    shutdown_image_pool()
+    ai_service.close()
     logger.info("MJ The Estimator API shutting down")
 
 app = FastAPI(
     title="MJ Estimator API", 
     version="1.0.0",
     route_class=LoggingRoute,  # Use custom route class for automatic logging
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
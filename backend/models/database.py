@@ -1,9 +1,31 @@
 import sqlite3
 import os
+import queue
+import asyncio
+import threading
 from contextlib import contextmanager
+from typing import Optional
 
 DATABASE_PATH = "db/estimate.db"
 
+# Number of pooled reader connections; writes share a single connection
+READER_POOL_SIZE = 8
+
+# Prepared statements kept per connection; every query text in the app fits, so none is re-prepared
+STATEMENT_CACHE_SIZE = 256
+
+# Per-thread transaction state
+_local = threading.local()
+
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+)
+
 def init_database():
     """Initialize database with required tables"""
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
@@ -56,6 +78,7 @@ def init_database():
             file_type TEXT,
             raw_data TEXT,
             parsed_json TEXT,
+            parsed_json_zst BLOB,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (session_id) REFERENCES pre_estimate_sessions(session_id)
         )''')
@@ -140,12 +163,45 @@ def init_database():
             FOREIGN KEY (session_id) REFERENCES pre_estimate_sessions(session_id)
         )''')
         
+        # Per-room edits layered on top of a measurement_data record
+        cursor.execute('''CREATE TABLE IF NOT EXISTS room_overrides (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            measurement_id INTEGER,
+            location TEXT,
+            room_name TEXT,
+            openings_json TEXT,
+            measurements_json TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (session_id) REFERENCES pre_estimate_sessions(session_id),
+            FOREIGN KEY (measurement_id) REFERENCES measurement_data(id)
+        )''')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_room_overrides_room ON room_overrides(measurement_id, location, room_name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_overrides_session ON room_overrides(session_id)')
+        
+        # Vision model responses keyed by a hash of the provider, model, prompt and images
+        cursor.execute('''CREATE TABLE IF NOT EXISTS ai_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''')
+        
+        # Create indices for latest-row lookups by session
+        # (pre_estimate_sessions.session_id is already indexed by its UNIQUE constraint)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_measurement_session_created ON measurement_data(session_id, created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_demo_scope_session_created ON demo_scope_data(session_id, created_at DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_scope_session_created ON work_scope_data(session_id, created_at DESC)')
+        
         # Migrate existing tables - add new jobsite columns if they don't exist
         try:
             # Check if old jobsite column exists and new columns don't
             cursor.execute("PRAGMA table_info(pre_estimate_sessions)")
             columns = [row[1] for row in cursor.fetchall()]
             
+            if 'jobsite' not in columns:
+                # Legacy column still read as the jobsite fallback and written by project updates
+                cursor.execute("ALTER TABLE pre_estimate_sessions ADD COLUMN jobsite TEXT")
+            
             if 'jobsite' in columns and 'jobsite_full_address' not in columns:
                 # Add new jobsite columns
                 cursor.execute("ALTER TABLE pre_estimate_sessions ADD COLUMN jobsite_full_address TEXT")
@@ -168,41 +224,156 @@ def init_database():
             # Column doesn't exist, add it
             cursor.execute("ALTER TABLE pre_estimate_sessions ADD COLUMN kitchen_cabinetry_enabled BOOLEAN DEFAULT 0")
         
+        # Check if the compressed measurement column exists
+        try:
+            cursor.execute("SELECT parsed_json_zst FROM measurement_data LIMIT 0")
+        except sqlite3.OperationalError:
+            # Column doesn't exist, add it; older rows keep their plain parsed_json
+            cursor.execute("ALTER TABLE measurement_data ADD COLUMN parsed_json_zst BLOB")
+        
         # Insert default prompts if not exists
         cursor.execute("INSERT OR IGNORE INTO prompts (step, template) VALUES (?, ?)",
                       ("work_scope", "작업 범위: {scope}\n주요 작업 항목을 나열하고 간단히 설명해:"))
         
         conn.commit()
+        
+        # Refresh planner statistics so latest-row lookups pick the session/created_at indices
+        conn.execute("PRAGMA optimize")
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection in autocommit mode with the performance PRAGMAs applied"""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        isolation_level=None
+    )
+    conn.row_factory = sqlite3.Row  # Enable dict-like access
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class ConnectionPool:
+    """Long-lived connections: a pool of readers and one writer serialized by a lock
+    
+    Under WAL, readers run concurrently with the single writer, and reusing
+    connections keeps their prepared statements cached.
+    """
+    
+    def __init__(self, reader_size: int = READER_POOL_SIZE):
+        self._reader_size = reader_size
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_count_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+    
+    @contextmanager
+    def reader(self):
+        """Borrow a reader connection"""
+        if getattr(_local, 'in_transaction', False):
+            # Read through the writer so the transaction's own changes are visible
+            with self.writer() as conn:
+                yield conn
+            return
+        
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_count_lock:
+                create = self._reader_count < self._reader_size
+                if create:
+                    self._reader_count += 1
+            conn = _connect() if create else self._readers.get()
+        
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @contextmanager
+    def writer(self):
+        """Hold the writer connection; re-entrant within a thread"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = _connect()
+            yield self._writer
+
+pool = ConnectionPool()
 
 @contextmanager
 def get_db_connection():
-    """Get database connection with context manager"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # Enable dict-like access
-    try:
+    """Get database connection with context manager (the writer, since callers may write)"""
+    with pool.writer() as conn:
         yield conn
-    finally:
-        conn.close()
+
+@contextmanager
+def transaction():
+    """Run the enclosed helper calls on the writer connection as a single transaction"""
+    with pool.writer() as conn:
+        if getattr(_local, 'in_transaction', False):
+            # Nested use joins the outer transaction
+            yield conn
+            return
+        
+        conn.execute("BEGIN IMMEDIATE")
+        _local.in_transaction = True
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            _local.in_transaction = False
+
+def _commit(conn: sqlite3.Connection):
+    """Commit unless the statement belongs to an enclosing transaction()"""
+    if not getattr(_local, 'in_transaction', False):
+        conn.commit()
 
 def execute_query(query: str, params: tuple = ()):
     """Execute a query and return results"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
+    with pool.reader() as conn:
+        cursor = conn.execute(query, params)
         return cursor.fetchall()
 
 def execute_insert(query: str, params: tuple = ()):
     """Execute insert query and return last row id"""
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
+        cursor = conn.execute(query, params)
+        _commit(conn)
         return cursor.lastrowid
 
 def execute_update(query: str, params: tuple = ()):
     """Execute update/delete query and return affected rows"""
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        return cursor.rowcount
\ No newline at end of file
+        cursor = conn.execute(query, params)
+        _commit(conn)
+        return cursor.rowcount
+
+def execute_returning(query: str, params: tuple = ()):
+    """Execute insert/update query with a RETURNING clause and return the first returned row"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(query, params)
+        # Step the statement to completion so the write is finished before committing
+        rows = cursor.fetchall()
+        _commit(conn)
+        return rows[0] if rows else None
+
+async def async_execute_query(query: str, params: tuple = ()):
+    """Execute a query in a worker thread without blocking the event loop"""
+    return await asyncio.to_thread(execute_query, query, params)
+
+async def async_execute_insert(query: str, params: tuple = ()):
+    """Execute insert query in a worker thread and return last row id"""
+    return await asyncio.to_thread(execute_insert, query, params)
+
+async def async_execute_update(query: str, params: tuple = ()):
+    """Execute update/delete query in a worker thread and return affected rows"""
+    return await asyncio.to_thread(execute_update, query, params)
+
+async def async_execute_returning(query: str, params: tuple = ()):
+    """Execute a RETURNING query in a worker thread and return the first returned row"""
+    return await asyncio.to_thread(execute_returning, query, params)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException
 from fastapi.responses import JSONResponse
 from typing import List, Optional
+import asyncio
 import uuid
 import json
 from datetime import datetime
@@ -11,8 +12,10 @@ from config import settings
 from PIL import Image
 
 import sqlite3
-from models.database import get_db_connection
+from models.database import async_execute_insert, async_execute_query, async_execute_update, execute_query, execute_update, transaction
+from services.measurement_store import measurement_store
 from services.ai_service import OpenAIService
+from routers.rag_demo_analysis import wait_for_analysis_store
 from utils.prompts import DEMO_ANALYSIS_PROMPT, DEMO_ANALYSIS_USER_MESSAGE, BATHROOM_DEMO_SCOPE_PROMPT
 
 router = APIRouter(prefix="/api/demo-analysis", tags=["demo-analysis"])
@@ -20,38 +23,30 @@ router = APIRouter(prefix="/api/demo-analysis", tags=["demo-analysis"])
 def get_room_measurement_data(session_id: str, room_id: str) -> dict:
     """Get measurement data for a specific room from the session"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT parsed_json FROM measurement_data 
-                WHERE session_id = ? 
-                ORDER BY created_at DESC LIMIT 1
-            """, (session_id,))
-            
-            result = cursor.fetchone()
-            if not result:
-                return {}
-            
-            measurement_data = json.loads(result[0])
-            
-            # Find the specific room data
-            for location in measurement_data:
-                if location.get('location') == room_id:
-                    rooms = location.get('rooms', [])
-                    if rooms:
-                        # Get the first room (main room) dimensions for reference
-                        room = rooms[0]
-                        raw_dims = room.get('raw_dimensions', {})
-                        return {
-                            'room_area': raw_dims.get('area', 0),
-                            'room_length': raw_dims.get('length', 0),
-                            'room_width': raw_dims.get('width', 0),
-                            'room_height': raw_dims.get('height', 8),
-                            'room_name': room.get('name', 'Unknown'),
-                            'floor': room.get('floor', 'Unknown')
-                        }
-            
+        latest = measurement_store.get_latest(session_id)
+        if not latest:
             return {}
+        
+        measurement_data = latest[1]
+        
+        # Find the specific room data
+        for location in measurement_data:
+            if location.get('location') == room_id:
+                rooms = location.get('rooms', [])
+                if rooms:
+                    # Get the first room (main room) dimensions for reference
+                    room = rooms[0]
+                    raw_dims = room.get('raw_dimensions', {})
+                    return {
+                        'room_area': raw_dims.get('area', 0),
+                        'room_length': raw_dims.get('length', 0),
+                        'room_width': raw_dims.get('width', 0),
+                        'room_height': raw_dims.get('height', 8),
+                        'room_name': room.get('name', 'Unknown'),
+                        'floor': room.get('floor', 'Unknown')
+                    }
+        
+        return {}
             
     except Exception as e:
         print(f"Error getting room measurement data: {str(e)}")
@@ -141,7 +136,7 @@ async def analyze_demo_images(
                 material_data = {}
         
         # Get measurement data for the specific room to provide area reference
-        measurement_data = get_room_measurement_data(session_id, room_id)
+        measurement_data = await asyncio.to_thread(get_room_measurement_data, session_id, room_id)
         
         # Call AI service for analysis
         ai_service = OpenAIService()
@@ -150,30 +145,27 @@ async def analyze_demo_images(
         analysis_results = await analyze_images_with_ai(ai_service, processed_images, room_type, material_data, measurement_data)
         
         # Save analysis to database
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO demo_ai_analysis (
-                    analysis_id, project_id, session_id, room_id,
-                    analysis_timestamp, model_version, prompt_version,
-                    images, ai_raw_response, ai_parsed_results,
-                    quality_score, is_verified, is_applied
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        await async_execute_insert("""
+            INSERT INTO demo_ai_analysis (
                 analysis_id, project_id, session_id, room_id,
-                datetime.utcnow().isoformat(), settings.openai_vision_model, "demo_v1",
-                json.dumps([{
-                    "id": img["id"],
-                    "filename": img["filename"],
-                    "size": img["size"],
-                    "dimensions": img["dimensions"]
-                } for img in processed_images]),
-                json.dumps(analysis_results["raw_response"]),
-                json.dumps(analysis_results["parsed_results"]),
-                analysis_results.get("quality_score", 0.8),
-                False, False
-            ))
-            conn.commit()
+                analysis_timestamp, model_version, prompt_version,
+                images, ai_raw_response, ai_parsed_results,
+                quality_score, is_verified, is_applied
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            analysis_id, project_id, session_id, room_id,
+            datetime.utcnow().isoformat(), settings.openai_vision_model, "demo_v1",
+            json.dumps([{
+                "id": img["id"],
+                "filename": img["filename"],
+                "size": img["size"],
+                "dimensions": img["dimensions"]
+            } for img in processed_images]),
+            json.dumps(analysis_results["raw_response"]),
+            json.dumps(analysis_results["parsed_results"]),
+            analysis_results.get("quality_score", 0.8),
+            False, False
+        ))
         
         # Return results
         return JSONResponse(content={
@@ -379,45 +371,38 @@ async def save_analysis_results(request_data: dict):
         if not analysis_id:
             raise HTTPException(status_code=400, detail="analysis_id is required")
         
-        # Find and update existing analysis
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if analysis exists
-            cursor.execute("SELECT analysis_id FROM demo_ai_analysis WHERE analysis_id = ?", (analysis_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Analysis not found")
-            
-            # Update with user modifications
-            update_fields = []
-            update_values = []
-            
-            if "modifications" in request_data:
-                update_fields.append("user_modifications = ?")
-                update_values.append(json.dumps(request_data["modifications"]))
-            
-            if "final_results" in request_data:
-                update_fields.append("quality_score = ?")
-                update_values.append(request_data.get("quality_score", 0.8))
-                
-                update_fields.append("is_verified = ?")
-                update_values.append(request_data.get("is_verified", False))
-                
-                update_fields.append("is_applied = ?")
-                update_values.append(request_data.get("is_applied", False))
-            
-            update_fields.append("updated_at = ?")
-            update_values.append(datetime.utcnow().isoformat())
-            
-            update_values.append(analysis_id)
+        # Update with user modifications
+        update_fields = []
+        update_values = []
+        
+        if "modifications" in request_data:
+            update_fields.append("user_modifications = ?")
+            update_values.append(json.dumps(request_data["modifications"]))
+        
+        if "final_results" in request_data:
+            update_fields.append("quality_score = ?")
+            update_values.append(request_data.get("quality_score", 0.8))
             
-            cursor.execute(f"""
-                UPDATE demo_ai_analysis 
-                SET {', '.join(update_fields)}
-                WHERE analysis_id = ?
-            """, update_values)
+            update_fields.append("is_verified = ?")
+            update_values.append(request_data.get("is_verified", False))
             
-            conn.commit()
+            update_fields.append("is_applied = ?")
+            update_values.append(request_data.get("is_applied", False))
+        
+        update_fields.append("updated_at = ?")
+        update_values.append(datetime.utcnow().isoformat())
+        
+        update_values.append(analysis_id)
+        
+        # Rows of analyses just answered may still be in flight; no updated row then means the analysis does not exist
+        await wait_for_analysis_store(analysis_id)
+        updated = await async_execute_update(f"""
+            UPDATE demo_ai_analysis 
+            SET {', '.join(update_fields)}
+            WHERE analysis_id = ?
+        """, tuple(update_values))
+        if not updated:
+            raise HTTPException(status_code=404, detail="Analysis not found")
         
         return JSONResponse(content={
             "success": True,
@@ -430,6 +415,40 @@ async def save_analysis_results(request_data: dict):
         print(f"Save error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save: {str(e)}")
 
+def _record_feedback(analysis_id: str, feedback: dict) -> bool:
+    """Store feedback and fold its rating into the quality score; False if the analysis does not exist
+    
+    Reads and updates in one transaction; run in a worker thread.
+    """
+    with transaction():
+        result = execute_query("SELECT quality_score FROM demo_ai_analysis WHERE analysis_id = ?", (analysis_id,))
+        if not result:
+            return False
+        
+        current_score = result[0][0] or 0.8
+        
+        # Add timestamp to feedback
+        feedback["timestamp"] = datetime.utcnow().isoformat()
+        
+        # Recalculate quality score based on feedback
+        new_quality_score = current_score
+        if "accuracy_rating" in feedback:
+            feedback_factor = feedback["accuracy_rating"] / 5.0
+            new_quality_score = (current_score + feedback_factor) / 2
+        
+        # Update feedback and quality score
+        execute_update("""
+            UPDATE demo_ai_analysis 
+            SET user_feedback = ?, quality_score = ?, updated_at = ?
+            WHERE analysis_id = ?
+        """, (
+            json.dumps(feedback),
+            new_quality_score,
+            datetime.utcnow().isoformat(),
+            analysis_id
+        ))
+    return True
+
 @router.post("/feedback")
 async def submit_feedback(request_data: dict):
     """
@@ -443,39 +462,9 @@ async def submit_feedback(request_data: dict):
             raise HTTPException(status_code=400, detail="analysis_id and feedback are required")
         
         # Find and update existing analysis
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if analysis exists
-            cursor.execute("SELECT quality_score FROM demo_ai_analysis WHERE analysis_id = ?", (analysis_id,))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(status_code=404, detail="Analysis not found")
-            
-            current_score = result[0] or 0.8
-            
-            # Add timestamp to feedback
-            feedback["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Recalculate quality score based on feedback
-            new_quality_score = current_score
-            if "accuracy_rating" in feedback:
-                feedback_factor = feedback["accuracy_rating"] / 5.0
-                new_quality_score = (current_score + feedback_factor) / 2
-            
-            # Update feedback and quality score
-            cursor.execute("""
-                UPDATE demo_ai_analysis 
-                SET user_feedback = ?, quality_score = ?, updated_at = ?
-                WHERE analysis_id = ?
-            """, (
-                json.dumps(feedback),
-                new_quality_score,
-                datetime.utcnow().isoformat(),
-                analysis_id
-            ))
-            
-            conn.commit()
+        await wait_for_analysis_store(analysis_id)
+        if not await asyncio.to_thread(_record_feedback, analysis_id, feedback):
+            raise HTTPException(status_code=404, detail="Analysis not found")
         
         return JSONResponse(content={
             "success": True,
@@ -494,63 +483,61 @@ async def get_analysis_debug(analysis_id: str):
     Get detailed debug information for an analysis including AI raw response
     """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT analysis_id, project_id, session_id, room_id,
-                       analysis_timestamp, model_version, prompt_version,
-                       images, ai_raw_response, ai_parsed_results,
-                       user_modifications, user_feedback, quality_score
-                FROM demo_ai_analysis 
-                WHERE analysis_id = ?
-            """, (analysis_id,))
-            
-            analysis = cursor.fetchone()
-            
-            if not analysis:
-                raise HTTPException(status_code=404, detail="Analysis not found")
-            
-            # Parse JSON fields safely
-            try:
-                images = json.loads(analysis[7]) if analysis[7] else []
-            except:
-                images = []
-            
-            try:
-                ai_raw_response = json.loads(analysis[8]) if analysis[8] else {}
-            except:
-                ai_raw_response = analysis[8]  # Keep as string if not JSON
-            
-            try:
-                ai_parsed_results = json.loads(analysis[9]) if analysis[9] else {}
-            except:
-                ai_parsed_results = {}
-            
-            try:
-                user_modifications = json.loads(analysis[10]) if analysis[10] else {}
-            except:
-                user_modifications = {}
-            
-            try:
-                user_feedback = json.loads(analysis[11]) if analysis[11] else {}
-            except:
-                user_feedback = {}
-            
-            result = {
-                "analysis_id": analysis[0],
-                "project_id": analysis[1],
-                "session_id": analysis[2],
-                "room_id": analysis[3],
-                "analysis_timestamp": analysis[4],
-                "model_version": analysis[5],
-                "prompt_version": analysis[6],
-                "images": images,
-                "ai_raw_response": ai_raw_response,
-                "ai_parsed_results": ai_parsed_results,
-                "user_modifications": user_modifications,
-                "user_feedback": user_feedback,
-                "quality_score": analysis[12]
-            }
+        await wait_for_analysis_store(analysis_id)
+        rows = await async_execute_query("""
+            SELECT analysis_id, project_id, session_id, room_id,
+                   analysis_timestamp, model_version, prompt_version,
+                   images, ai_raw_response, ai_parsed_results,
+                   user_modifications, user_feedback, quality_score
+            FROM demo_ai_analysis 
+            WHERE analysis_id = ?
+        """, (analysis_id,))
+        
+        if not rows:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        analysis = rows[0]
+        
+        # Parse JSON fields safely
+        try:
+            images = json.loads(analysis[7]) if analysis[7] else []
+        except:
+            images = []
+        
+        try:
+            ai_raw_response = json.loads(analysis[8]) if analysis[8] else {}
+        except:
+            ai_raw_response = analysis[8]  # Keep as string if not JSON
+        
+        try:
+            ai_parsed_results = json.loads(analysis[9]) if analysis[9] else {}
+        except:
+            ai_parsed_results = {}
+        
+        try:
+            user_modifications = json.loads(analysis[10]) if analysis[10] else {}
+        except:
+            user_modifications = {}
+        
+        try:
+            user_feedback = json.loads(analysis[11]) if analysis[11] else {}
+        except:
+            user_feedback = {}
+        
+        result = {
+            "analysis_id": analysis[0],
+            "project_id": analysis[1],
+            "session_id": analysis[2],
+            "room_id": analysis[3],
+            "analysis_timestamp": analysis[4],
+            "model_version": analysis[5],
+            "prompt_version": analysis[6],
+            "images": images,
+            "ai_raw_response": ai_raw_response,
+            "ai_parsed_results": ai_parsed_results,
+            "user_modifications": user_modifications,
+            "user_feedback": user_feedback,
+            "quality_score": analysis[12]
+        }
         
         return JSONResponse(content={
             "success": True,
@@ -569,29 +556,25 @@ async def get_project_analyses(project_id: str):
     Get all analyses for a project
     """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT analysis_id, room_id, analysis_timestamp, quality_score, 
-                       is_verified, is_applied, user_feedback
-                FROM demo_ai_analysis 
-                WHERE project_id = ?
-                ORDER BY analysis_timestamp DESC
-            """, (project_id,))
-            
-            analyses = cursor.fetchall()
-            
-            result = []
-            for analysis in analyses:
-                result.append({
-                    "analysis_id": analysis[0],
-                    "room_id": analysis[1],
-                    "analysis_timestamp": analysis[2],
-                    "quality_score": analysis[3],
-                    "is_verified": bool(analysis[4]),
-                    "is_applied": bool(analysis[5]),
-                    "has_feedback": analysis[6] is not None
-                })
+        analyses = await async_execute_query("""
+            SELECT analysis_id, room_id, analysis_timestamp, quality_score, 
+                   is_verified, is_applied, user_feedback
+            FROM demo_ai_analysis 
+            WHERE project_id = ?
+            ORDER BY analysis_timestamp DESC
+        """, (project_id,))
+        
+        result = []
+        for analysis in analyses:
+            result.append({
+                "analysis_id": analysis[0],
+                "room_id": analysis[1],
+                "analysis_timestamp": analysis[2],
+                "quality_score": analysis[3],
+                "is_verified": bool(analysis[4]),
+                "is_applied": bool(analysis[5]),
+                "has_feedback": analysis[6] is not None
+            })
         
         return JSONResponse(content={
             "success": True,
@@ -1,17 +1,31 @@
-import json
+import os
+import copy
+import math
 import time
 import uuid
+import base64
+import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional
+import itertools
+import weakref
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from typing import Any, Dict, List, Optional, Tuple
 
-from models.database import execute_insert, execute_query, execute_update
+from models.database import (
+    async_execute_insert, async_execute_query, async_execute_returning, async_execute_update,
+    execute_insert, execute_update, transaction
+)
 from models.schemas import (
     MeasurementDataResponse, DemoScopeRequest, DemoScopeResponse,
     WorkScopeRequest, WorkScopeResponse, PreEstimateSessionResponse,
-    CompletePreEstimateResponse, RoomOpeningUpdate, RoomOpeningResponse,
+    RoomOpeningUpdate, RoomOpeningResponse,
     ProjectUpdateRequest, ProjectListResponse, FinalEstimateResponse,
-    CreateProjectRequest, CompanyInfo, JobsiteAddress, MeasurementSaveRequest,
+    CreateProjectRequest, CompanyInfo, JobsiteAddress,
     AreaCalculationRequest
 )
 from services.ai_service import ai_service
@@ -19,10 +33,269 @@ from services.ocr_service import ocr_service
 from services.file_service import file_service
 from services.final_estimate_service import final_estimate_service
 from services.demolition_scope_service import demolition_scope_service
+from services.measurement_store import measurement_store
+from services.pdf_parser_service import pdf_parser_service
+from services.room_calculator import RoomCalculator
+from utils.logger import logger as app_logger
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/pre-estimate", tags=["pre-estimate"])
 
+SUPPORTED_MEASUREMENT_FILE_TYPES = {'image', 'csv'}
+
+def _dumps(value: Any) -> str:
+    """Serialize a value to JSON text for storage in a TEXT column"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+_loads = orjson.loads
+
+def _parse_json_object(body: bytes) -> Dict[str, Any]:
+    """Parse a request body that must be a JSON object
+    
+    Auto-save bodies are read as raw bytes and parsed here with orjson rather than
+    declared as dict parameters, which FastAPI would decode and then copy through
+    Pydantic validation.
+    """
+    try:
+        data = _loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return data
+
+# Process pool for CPU-bound PDF parsing, created on first use
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Get the shared PDF parsing process pool"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pdf_pool
+
+# Parsed measurement data for recently edited sessions: session_id -> (record id, locations)
+_measurement_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_measurement_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _get_measurement_lock(session_id: str) -> asyncio.Lock:
+    """Get the lock serializing read-modify-write cycles on a session's measurement data"""
+    lock = _measurement_locks.get(session_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _measurement_locks[session_id] = lock
+    return lock
+
+async def _get_latest_measurement(session_id: str) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+    """Get (record id, parsed locations) of the latest measurement data, using the cache when possible"""
+    cached = _measurement_cache.get(session_id)
+    if cached is not None:
+        return cached
+    
+    entry = await asyncio.to_thread(measurement_store.get_latest, session_id)
+    if entry is not None:
+        _measurement_cache[session_id] = entry
+    return entry
+
+def _invalidate_measurement_cache(session_id: str):
+    """Drop cached measurement data after it has been rewritten elsewhere"""
+    _measurement_cache.pop(session_id, None)
+    _invalidate_complete_cache(session_id)
+
+async def _insert_measurement(session_id: str, file_name: str, file_type: str, raw_data: str,
+                              locations: List[Dict[str, Any]]) -> int:
+    """Store a new measurement upload and drop the cached one
+    
+    Holds the session's measurement lock, so a room edit that read the previous record
+    cannot put it back into the cache after the new one is inserted.
+    """
+    async with _get_measurement_lock(session_id):
+        insert_id = await asyncio.to_thread(
+            measurement_store.insert, session_id, file_name, file_type, raw_data, locations
+        )
+        _invalidate_measurement_cache(session_id)
+    return insert_id
+
+# Invalidation stamps of the response caches below: a reader caches what it read only when
+# the key's stamp is unchanged after its awaits, so a write landing in between is not undone.
+# Stamps come from one counter and never repeat, so an evicted stamp cannot match again.
+_cache_stamps = itertools.count(1)
+
+# Serialized /complete responses: session_id -> JSON bytes
+_complete_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_complete_generations: LRUCache = LRUCache(maxsize=4096)
+
+def _complete_generation(session_id: str) -> int:
+    """Current invalidation stamp of a session's /complete response"""
+    return _complete_generations.get(session_id, 0)
+
+def _invalidate_complete_cache(session_id: str):
+    """Drop a cached /complete response after measurement, demo or work scope data changes"""
+    _complete_cache.pop(session_id, None)
+    _complete_generations[session_id] = next(_cache_stamps)
+
+# Serialized responses of frequently polled session reads: ('session', session_id) or PROJECT_LIST_KEY -> JSON bytes
+_session_response_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+PROJECT_LIST_KEY = ('projects',)
+
+# Session columns returned to clients; jobsite prefers the new full address over the legacy column
+SESSION_COLUMNS = """id, session_id, status, created_at, updated_at, project_name,
+    COALESCE(NULLIF(jobsite_full_address, ''), jobsite) AS jobsite, occupancy,
+    company_name, company_address, company_city, company_state, company_zip,
+    company_phone, company_email, kitchen_cabinetry_enabled"""
+
+# Parsed auto-save payloads returned by the get_saved_* endpoints: (kind, session_id) -> response dict
+_saved_cache: LRUCache = LRUCache(maxsize=512)
+_saved_generations: LRUCache = LRUCache(maxsize=4096)
+SAVED_KINDS = ('material-scope', 'progress', 'demo-scope', 'kitchen-cabinetry')
+
+def _saved_generation(kind: str, session_id: str) -> int:
+    """Current invalidation stamp of a session's auto-save payload"""
+    return _saved_generations.get((kind, session_id), 0)
+
+def _store_saved(kind: str, session_id: str, generation: int, result: Dict[str, Any]):
+    """Cache a get_saved_* result unless a save invalidated the payload while it was read"""
+    if _saved_generation(kind, session_id) == generation:
+        _saved_cache[(kind, session_id)] = result
+
+def _invalidate_saved_cache(session_id: str, *kinds: str):
+    """Drop cached auto-save payloads of a session; all kinds when none are given"""
+    for kind in kinds or SAVED_KINDS:
+        _saved_cache.pop((kind, session_id), None)
+        _saved_generations[(kind, session_id)] = next(_cache_stamps)
+
+# Recently validated session rows: session_id -> row dict
+_session_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+async def _get_session_row(session_id: str) -> Optional[Dict[str, Any]]:
+    """Get a pre_estimate_sessions row as a dict, using the cache when possible"""
+    cached = _session_cache.get(session_id)
+    if cached is not None:
+        return cached
+    
+    sessions = await async_execute_query(
+        f"SELECT {SESSION_COLUMNS} FROM pre_estimate_sessions WHERE session_id = ?",
+        (session_id,)
+    )
+    if not sessions:
+        return None
+    
+    session = dict(sessions[0])
+    _session_cache[session_id] = session
+    return session
+
+async def _session_exists(session_id: str) -> bool:
+    """Check whether a session exists without reading its columns"""
+    if session_id in _session_cache:
+        return True
+    return bool(await async_execute_query(
+        "SELECT 1 FROM pre_estimate_sessions WHERE session_id = ? LIMIT 1",
+        (session_id,)
+    ))
+
+def _invalidate_session_cache(session_id: str):
+    """Drop a cached session row after its columns change"""
+    _session_cache.pop(session_id, None)
+    _session_response_cache.pop(('session', session_id), None)
+    _session_response_cache.pop(PROJECT_LIST_KEY, None)
+    _invalidate_complete_cache(session_id)
+
+def _format_timestamp(value: Any) -> Any:
+    """Format a SQLite timestamp the way the datetime response fields serialize it"""
+    if isinstance(value, str):
+        return value.replace(' ', 'T', 1)
+    return value
+
+def _build_session_payload(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a PreEstimateSessionResponse-shaped dict from a trusted pre_estimate_sessions row"""
+    company = None
+    if session.get('company_name'):
+        company = {
+            "name": session['company_name'],
+            "address": session.get('company_address'),
+            "city": session.get('company_city'),
+            "state": session.get('company_state'),
+            "zip": session.get('company_zip'),
+            "phone": session.get('company_phone'),
+            "email": session.get('company_email')
+        }
+    
+    return {
+        "id": session['id'],
+        "session_id": session['session_id'],
+        "status": session['status'],
+        "created_at": _format_timestamp(session['created_at']),
+        "updated_at": _format_timestamp(session['updated_at']),
+        "project_name": session.get('project_name'),
+        "jobsite": session.get('jobsite') or None,
+        "occupancy": session.get('occupancy'),
+        "company": company,
+        "kitchen_cabinetry_enabled": bool(session.get('kitchen_cabinetry_enabled') or 0)
+    }
+
+def _build_session_model(session: Dict[str, Any]) -> PreEstimateSessionResponse:
+    """Build a PreEstimateSessionResponse from a trusted row without re-running validation"""
+    payload = _build_session_payload(session)
+    if payload['company'] is not None:
+        payload['company'] = CompanyInfo.model_construct(**payload['company'])
+    for field in ('created_at', 'updated_at'):
+        if isinstance(payload[field], str):
+            payload[field] = datetime.fromisoformat(payload[field])
+    return PreEstimateSessionResponse.model_construct(**payload)
+
+def _save_demo_scope_rows(session_id: str, demo_scope_data: str):
+    """Update the session's demo scope rows, inserting one if there are none, in one transaction"""
+    with transaction():
+        # demo_scope_data has no unique session_id to upsert on
+        updated = execute_update(
+            "UPDATE demo_scope_data SET parsed_json = ? WHERE session_id = ?",
+            (demo_scope_data, session_id)
+        )
+        
+        if not updated:
+            # Insert new demo scope data
+            execute_insert(
+                "INSERT INTO demo_scope_data (session_id, parsed_json) VALUES (?, ?)",
+                (session_id, demo_scope_data)
+            )
+
+# orjson options shared by generated download files; datetimes, UUIDs and numpy values
+# are encoded natively, so default=str only catches anything else
+OUTPUT_JSON_OPTION = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _write_json_output(filepath: str, value: Any, option: int = OUTPUT_JSON_OPTION) -> bytes:
+    """Encode a value as JSON and write it to an output file; returns the encoded bytes"""
+    content = orjson.dumps(value, default=str, option=option)
+    file_service.write_file(filepath, content)
+    return content
+
+def _delete_project_rows(session_id: str):
+    """Delete a session and all of its related rows in one transaction"""
+    with transaction():
+        # Delete related data first (due to foreign key constraints)
+        measurement_store.delete_session(session_id)
+        execute_update(
+            "DELETE FROM demo_scope_data WHERE session_id = ?",
+            (session_id,)
+        )
+        execute_update(
+            "DELETE FROM work_scope_data WHERE session_id = ?",
+            (session_id,)
+        )
+        
+        # Delete the project
+        execute_update(
+            "DELETE FROM pre_estimate_sessions WHERE session_id = ?",
+            (session_id,)
+        )
+
+def shutdown_pdf_pool():
+    """Shut down the PDF parsing process pool"""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
 @router.post("/session", response_model=PreEstimateSessionResponse)
 async def create_session(request: Optional[CreateProjectRequest] = None):
     """Create a new pre-estimate session"""
@@ -30,68 +303,27 @@ async def create_session(request: Optional[CreateProjectRequest] = None):
     
     try:
         # Prepare values
-        project_name = request.project_name if request else None
-        occupancy = request.occupancy if request else None
-        
-        # Handle jobsite address structure
-        jobsite_full_address = request.jobsite.full_address if request and request.jobsite else None
-        jobsite_street = request.jobsite.street if request and request.jobsite else None
-        jobsite_city = request.jobsite.city if request and request.jobsite else None
-        jobsite_state = request.jobsite.state if request and request.jobsite else None
-        jobsite_zipcode = request.jobsite.zipcode if request and request.jobsite else None
-        
-        company_name = request.company.name if request and request.company else None
-        company_address = request.company.address if request and request.company else None
-        company_city = request.company.city if request and request.company else None
-        company_state = request.company.state if request and request.company else None
-        company_zip = request.company.zip if request and request.company else None
-        company_phone = request.company.phone if request and request.company else None
-        company_email = request.company.email if request and request.company else None
-        
-        insert_id = execute_insert(
+        data = request.model_dump() if request else {}
+        jobsite = data.get('jobsite') or {}
+        company = data.get('company') or {}
+        
+        session = await async_execute_returning(
             """INSERT INTO pre_estimate_sessions 
                (session_id, status, project_name, jobsite_full_address, jobsite_street, 
                 jobsite_city, jobsite_state, jobsite_zipcode, occupancy,
                 company_name, company_address, company_city, company_state, 
                 company_zip, company_phone, company_email) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (session_id, "in_progress", project_name, jobsite_full_address, jobsite_street,
-             jobsite_city, jobsite_state, jobsite_zipcode, occupancy,
-             company_name, company_address, company_city, company_state,
-             company_zip, company_phone, company_email)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               RETURNING """ + SESSION_COLUMNS,
+            (session_id, "in_progress", data.get('project_name'),
+             jobsite.get('full_address'), jobsite.get('street'), jobsite.get('city'),
+             jobsite.get('state'), jobsite.get('zipcode'), data.get('occupancy'),
+             company.get('name'), company.get('address'), company.get('city'), company.get('state'),
+             company.get('zip'), company.get('phone'), company.get('email'))
         )
         
-        # Fetch the created session
-        session = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE id = ?",
-            (insert_id,)
-        )[0]
-        
-        # Build company info
-        company = None
-        if session['company_name']:
-            company = CompanyInfo(
-                name=session['company_name'],
-                address=session['company_address'],
-                city=session['company_city'],
-                state=session['company_state'],
-                zip=session['company_zip'],
-                phone=session['company_phone'],
-                email=session['company_email']
-            )
-        
-        return PreEstimateSessionResponse(
-            id=session['id'],
-            session_id=session['session_id'],
-            status=session['status'],
-            created_at=session['created_at'],
-            updated_at=session['updated_at'],
-            project_name=session['project_name'] if session['project_name'] is not None else None,
-            jobsite=session['jobsite_full_address'] if session['jobsite_full_address'] is not None else None,
-            occupancy=session['occupancy'] if session['occupancy'] is not None else None,
-            company=company,
-            kitchen_cabinetry_enabled=bool(session['kitchen_cabinetry_enabled'] if 'kitchen_cabinetry_enabled' in session.keys() else 0)
-        )
+        _session_response_cache.pop(PROJECT_LIST_KEY, None)
+        return _build_session_model(dict(session))
         
     except Exception as e:
         logger.error(f"Error creating session: {e}", exc_info=True)
@@ -102,51 +334,19 @@ async def create_session(request: Optional[CreateProjectRequest] = None):
 async def get_session(session_id: str):
     """Get session information"""
     try:
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
+        cached = _session_response_cache.get(('session', session_id))
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
         
-        if not sessions:
+        session = await _get_session_row(session_id)
+        
+        if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        session = sessions[0]
-        
-        # Convert sqlite3.Row to dict for easier access
-        session_dict = dict(session)
-        
-        # Build company info
-        company = None
-        if session_dict.get('company_name'):
-            company = CompanyInfo(
-                name=session_dict['company_name'],
-                address=session_dict.get('company_address'),
-                city=session_dict.get('company_city'),
-                state=session_dict.get('company_state'),
-                zip=session_dict.get('company_zip'),
-                phone=session_dict.get('company_phone'),
-                email=session_dict.get('company_email')
-            )
-        
-        # Handle jobsite - use new structure if available, fallback to old
-        jobsite_value = None
-        if session_dict.get('jobsite_full_address'):
-            jobsite_value = session_dict['jobsite_full_address']
-        elif session_dict.get('jobsite'):
-            jobsite_value = session_dict['jobsite']
-        
-        return PreEstimateSessionResponse(
-            id=session_dict['id'],
-            session_id=session_dict['session_id'],
-            status=session_dict['status'],
-            created_at=session_dict['created_at'],
-            updated_at=session_dict['updated_at'],
-            project_name=session_dict['project_name'] if session_dict['project_name'] is not None else None,
-            jobsite=jobsite_value,
-            occupancy=session_dict.get('occupancy'),
-            company=company,
-            kitchen_cabinetry_enabled=bool(session_dict['kitchen_cabinetry_enabled'] if 'kitchen_cabinetry_enabled' in session_dict.keys() else 0)
-        )
+        # Serialize the trusted row directly, skipping response model validation
+        content = orjson.dumps(_build_session_payload(session))
+        _session_response_cache[('session', session_id)] = content
+        return Response(content=content, media_type="application/json")
         
     except HTTPException:
         raise
@@ -159,21 +359,15 @@ async def get_session(session_id: str):
 async def get_measurement_data(session_id: str):
     """Get measurement data for a session"""
     try:
-        # Get measurement data from database
-        measurements = execute_query(
-            "SELECT parsed_json FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
+        # Get measurement data from cache or database
+        latest = await _get_latest_measurement(session_id)
         
-        if not measurements or not measurements[0]['parsed_json']:
+        if not latest:
             raise HTTPException(status_code=404, detail="No measurement data found for session")
         
-        # Parse and return the data
-        measurement_data = json.loads(measurements[0]['parsed_json'])
-        
         return {
             "success": True,
-            "data": measurement_data
+            "data": latest[1]
         }
         
     except HTTPException:
@@ -182,108 +376,153 @@ async def get_measurement_data(session_id: str):
         logger.error(f"Error getting measurement data: {e}")
         raise HTTPException(status_code=500, detail="Failed to get measurement data")
 
-@router.post("/measurement")
-async def process_measurement_data(
-    file: UploadFile = File(...),
-    session_id: Optional[str] = Form(None),
-    file_type: str = Form(...)
-):
-    """Process measurement data from uploaded file"""
-    from utils.logger import logger
-    
-    logger.info(f"Processing measurement file: {file.filename}", 
-                file_name=file.filename, 
-                file_type=file_type,
-                session_id=session_id)
-    
+async def _parse_saved_measurement(
+    session_id: str, saved_path: str, file_size: int, file_name: str, file_type: str
+) -> Dict[str, Any]:
+    """Parse a saved measurement upload, store the result and return the response payload"""
     try:
-        # Create session if not provided
-        if not session_id:
-            session_response = await create_session()
-            session_id = session_response.session_id
-        
-        # Read file content
-        file_content = await file.read()
-        logger.info(f"File read successfully, size: {len(file_content)} bytes")
-        
-        # Save uploaded file
-        saved_path = file_service.save_uploaded_file(file_content, file.filename)
-        logger.info(f"File saved to: {saved_path}")
-        
         # Process based on file type
-        if file_type.lower() == 'image':
+        if file_type == 'image':
             # Check if it's actually a PDF file
-            if file.filename and file.filename.lower().endswith('.pdf'):
+            if file_name and file_name.lower().endswith('.pdf'):
                 logger.info("Processing PDF file directly")
-                from services.pdf_parser_service import pdf_parser_service
-                # Process PDF with dedicated parser
-                locations = pdf_parser_service.process_pdf_for_measurements(file_content)
+                # Process PDF with dedicated parser in a worker process
+                locations = await asyncio.get_running_loop().run_in_executor(
+                    _get_pdf_pool(),
+                    pdf_parser_service.process_pdf_for_measurements,
+                    saved_path
+                )
                 
                 # Save to database
-                insert_id = execute_insert(
-                    """INSERT INTO measurement_data 
-                       (session_id, file_name, file_type, raw_data, parsed_json) 
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (session_id, file.filename, "pdf", f"PDF processed - {len(file_content)} bytes", json.dumps(locations))
+                insert_id = await _insert_measurement(
+                    session_id, file_name, "pdf", f"PDF processed - {file_size} bytes", locations
                 )
                 
-                # Clean up saved file
-                file_service.cleanup_file(saved_path)
-                
                 # Return processed data directly without AI parsing
                 return {
                     "id": insert_id,
                     "session_id": session_id,
-                    "file_name": file.filename,
+                    "file_name": file_name,
                     "file_type": "pdf",
-                    "raw_data": f"PDF processed - {len(file_content)} bytes",
+                    "raw_data": f"PDF processed - {file_size} bytes",
                     "data": locations
                 }
             else:
                 logger.info("Processing image with OCR")
                 # Use OCR to extract text
-                raw_data = ocr_service.extract_text_from_image(file_content)
-        elif file_type.lower() == 'csv':
+                file_content = await asyncio.to_thread(file_service.read_file, saved_path)
+                raw_data = await asyncio.to_thread(ocr_service.extract_text_from_image, file_content)
+        else:
             logger.info("Processing CSV file")
             # Process CSV content
+            file_content = await asyncio.to_thread(file_service.read_file, saved_path)
             raw_data = file_service.process_csv_content(file_content)
-        else:
-            logger.error(f"Unsupported file type: {file_type}")
-            raise HTTPException(status_code=400, detail="Unsupported file type")
         
         logger.info(f"Raw data extracted, length: {len(raw_data)} characters")
         
         # Parse with AI (with timeout protection)
         logger.info("Starting AI parsing")
-        parsed_data = ai_service.parse_measurement_data(raw_data, file_type, session_id)
+        parsed_data = await asyncio.to_thread(ai_service.parse_measurement_data, raw_data, file_type, session_id)
         logger.info("AI parsing completed successfully")
         
         # Save to database
-        insert_id = execute_insert(
-            """INSERT INTO measurement_data 
-               (session_id, file_name, file_type, raw_data, parsed_json) 
-               VALUES (?, ?, ?, ?, ?)""",
-            (session_id, file.filename, file_type, raw_data, json.dumps(parsed_data))
-        )
-        
-        # Clean up saved file
-        file_service.cleanup_file(saved_path)
+        insert_id = await _insert_measurement(session_id, file_name, file_type, raw_data, parsed_data)
         
         return {
             "id": insert_id,
             "session_id": session_id,
-            "file_name": file.filename,
+            "file_name": file_name,
             "file_type": file_type,
             "raw_data": raw_data,
             "data": parsed_data
         }
+    finally:
+        # Clean up saved file
+        file_service.cleanup_file(saved_path)
+
+# Background measurement jobs: job_id -> status payload
+_measurement_jobs: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_measurement_job_tasks: set = set()
+
+async def _run_measurement_job(job_id: str, *args):
+    """Run _parse_saved_measurement in the background and record its outcome"""
+    job = _measurement_jobs.get(job_id, {"job_id": job_id})
+    job["status"] = "processing"
+    _measurement_jobs[job_id] = job
+    try:
+        result = await _parse_saved_measurement(*args)
+        _measurement_jobs[job_id] = {**job, "status": "completed", "result": result}
+    except Exception as e:
+        logger.error(f"Measurement job {job_id} failed: {e}")
+        _measurement_jobs[job_id] = {**job, "status": "failed", "error": str(e)}
+
+@router.post("/measurement")
+async def process_measurement_data(
+    file: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
+    file_type: str = Form(...),
+    background: bool = Form(False)
+):
+    """Process measurement data from uploaded file
+    
+    With background=true the upload is parsed in a background task and a 202
+    response with a job status URL is returned immediately.
+    """
+    app_logger.info(f"Processing measurement file: {file.filename}", 
+                file_name=file.filename, 
+                file_type=file_type,
+                session_id=session_id)
+    
+    # Reject unsupported types before reading or saving the upload
+    file_type = file_type.lower()
+    if file_type not in SUPPORTED_MEASUREMENT_FILE_TYPES:
+        app_logger.error(f"Unsupported file type: {file_type}")
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+    
+    try:
+        # Create session if not provided
+        if not session_id:
+            session_response = await create_session()
+            session_id = session_response.session_id
+        
+        # Stream the upload to disk so it is never held in memory as a whole
+        saved_path, file_size = await file_service.save_upload_stream(file, file.filename)
+        app_logger.info(f"File saved to: {saved_path}, size: {file_size} bytes")
+        
+        if background:
+            job_id = str(uuid.uuid4())
+            _measurement_jobs[job_id] = {"job_id": job_id, "session_id": session_id, "status": "pending"}
+            
+            task = asyncio.create_task(_run_measurement_job(
+                job_id, session_id, saved_path, file_size, file.filename, file_type
+            ))
+            # Keep a reference so the task is not garbage collected mid-run
+            _measurement_job_tasks.add(task)
+            task.add_done_callback(_measurement_job_tasks.discard)
+            
+            return ORJSONResponse(status_code=202, content={
+                "job_id": job_id,
+                "session_id": session_id,
+                "status": "pending",
+                "status_url": f"/api/pre-estimate/measurement/status/{job_id}"
+            })
+        
+        return await _parse_saved_measurement(session_id, saved_path, file_size, file.filename, file_type)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error processing measurement data: {e}")
+        app_logger.error(f"Error processing measurement data: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process measurement data: {str(e)}")
 
+@router.get("/measurement/status/{job_id}")
+async def get_measurement_job_status(job_id: str):
+    """Get the status of a background measurement processing job"""
+    job = _measurement_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Measurement job not found")
+    return job
+
 @router.post("/demo-scope", response_model=DemoScopeResponse)
 async def process_demo_scope(request: DemoScopeRequest):
     """Process demolition scope text"""
@@ -295,22 +534,25 @@ async def process_demo_scope(request: DemoScopeRequest):
             session_id = session_response.session_id
         
         # Parse with AI
-        parsed_data = ai_service.parse_demo_scope(request.input_text)
+        parsed_data = await asyncio.to_thread(ai_service.parse_demo_scope, request.input_text)
         
         # Save to database
-        insert_id = execute_insert(
+        insert_id = await async_execute_insert(
             """INSERT INTO demo_scope_data 
                (session_id, input_text, parsed_json) 
                VALUES (?, ?, ?)""",
-            (session_id, request.input_text, json.dumps(parsed_data))
+            (session_id, request.input_text, _dumps(parsed_data))
         )
+        _invalidate_complete_cache(session_id)
+        _invalidate_saved_cache(session_id, 'demo-scope')
         
-        return {
+        # Returning a response directly skips re-validating what was just stored
+        return ORJSONResponse(content={
             "id": insert_id,
             "session_id": session_id,
             "input_text": request.input_text,
             "data": parsed_data
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error processing demo scope: {e}")
@@ -327,86 +569,95 @@ async def process_work_scope(request: WorkScopeRequest):
             session_id = session_response.session_id
         
         # Parse with AI
-        parsed_data = ai_service.parse_work_scope(request.input_data)
+        parsed_data = await asyncio.to_thread(ai_service.parse_work_scope, request.input_data)
         
         # Save to database
-        insert_id = execute_insert(
+        insert_id = await async_execute_insert(
             """INSERT INTO work_scope_data 
                (session_id, input_data, parsed_json) 
                VALUES (?, ?, ?)""",
-            (session_id, request.input_data, json.dumps(parsed_data))
+            (session_id, request.input_data, _dumps(parsed_data))
         )
+        _invalidate_complete_cache(session_id)
         
-        return {
+        # Returning a response directly skips re-validating what was just stored
+        return ORJSONResponse(content={
             "id": insert_id,
             "session_id": session_id,
             "input_data": request.input_data,
             "data": parsed_data
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error processing work scope: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process work scope: {str(e)}")
 
-@router.get("/complete/{session_id}", response_model=CompletePreEstimateResponse)
+@router.get("/complete/{session_id}")
 async def get_complete_data(session_id: str):
     """Get all completed pre-estimate data for a session"""
     try:
-        # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
+        cached = _complete_cache.get(session_id)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        generation = _complete_generation(session_id)
+        
+        # Fetch the session and its latest measurement, demo and work scope rows concurrently
+        session, latest, demo_scopes, work_scopes = await asyncio.gather(
+            _get_session_row(session_id),
+            _get_latest_measurement(session_id),
+            async_execute_query(
+                "SELECT parsed_json FROM demo_scope_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
+                (session_id,)
+            ),
+            async_execute_query(
+                "SELECT parsed_json FROM work_scope_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
+                (session_id,)
+            )
         )
         
-        if not sessions:
+        if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        session = sessions[0]
-        
         # Get measurement data
         measurement_data = None
-        measurements = execute_query(
-            "SELECT * FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
-        if measurements:
-            measurement_data = json.loads(measurements[0]['parsed_json'])
+        if latest:
+            measurement_data = latest[1]
         
         # Get demo scope data
         demo_scope_data = None
-        demo_scopes = execute_query(
-            "SELECT * FROM demo_scope_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
         if demo_scopes:
-            demo_scope_data = json.loads(demo_scopes[0]['parsed_json'])
+            demo_scope_data = orjson.loads(demo_scopes[0]['parsed_json'])
         
         # Get work scope data
         work_scope_data = None
-        work_scopes = execute_query(
-            "SELECT * FROM work_scope_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
         if work_scopes:
-            work_scope_data = json.loads(work_scopes[0]['parsed_json'])
+            work_scope_data = orjson.loads(work_scopes[0]['parsed_json'])
         
         # Update session status to completed if all data exists
         if measurement_data and demo_scope_data and work_scope_data:
-            execute_update(
+            await async_execute_update(
                 "UPDATE pre_estimate_sessions SET status = 'completed', updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
                 (session_id,)
             )
+            # Our own status change invalidates the response too; only writes before it make the read stale
+            unchanged = _complete_generation(session_id) == generation
+            _invalidate_session_cache(session_id)
+            if unchanged:
+                generation = _complete_generation(session_id)
             status = "completed"
         else:
             status = session['status']
         
-        return CompletePreEstimateResponse(
-            session_id=session_id,
-            measurement_data=measurement_data,
-            demo_scope_data=demo_scope_data,
-            work_scope_data=work_scope_data,
-            status=status
-        )
+        content = orjson.dumps({
+            "session_id": session_id,
+            "measurement_data": measurement_data,
+            "demo_scope_data": demo_scope_data,
+            "work_scope_data": work_scope_data,
+            "status": status
+        })
+        if _complete_generation(session_id) == generation:
+            _complete_cache[session_id] = content
+        return Response(content=content, media_type="application/json")
         
     except HTTPException:
         raise
@@ -414,102 +665,96 @@ async def get_complete_data(session_id: str):
         logger.error(f"Error getting complete data: {e}")
         raise HTTPException(status_code=500, detail="Failed to get complete data")
 
+def _apply_room_openings(room: Dict[str, Any], openings: List[Any]):
+    """Replace a room's openings and recalculate its measurements in place"""
+    # Update openings
+    room['openings'] = [
+        {
+            "type": opening.type,
+            "width": opening.width,
+            "height": opening.height
+        }
+        for opening in openings
+    ]
+    
+    # Recalculate measurements for this room
+    # Create room data structure for recalculation
+    # Try to get original dimensions or calculate from area
+    floor_area = room['measurements'].get('floor_area_sqft', 100.0)
+    height = room['measurements'].get('height', 8.0)
+    
+    # Try to get original dimensions or estimate from area
+    original_length = room['measurements'].get('length')
+    original_width = room['measurements'].get('width')
+    
+    if not original_length or not original_width:
+        # Estimate dimensions from area (assume square room)
+        original_length = original_width = math.sqrt(floor_area)
+    
+    room_data = {
+        "name": room['name'],
+        "raw_dimensions": {
+            "length": float(original_length),
+            "width": float(original_width),
+            "height": float(height),
+            "area": float(floor_area)
+        },
+        "openings": room['openings']
+    }
+    
+    # Recalculate measurements
+    updated_room = RoomCalculator.calculate_room_measurements(room_data)
+    room['measurements'] = updated_room['measurements']
+
+def _replace_rooms(locations: List[Dict[str, Any]], edited: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy of the locations with rooms swapped for their edited copies, keyed by id() of the original room
+    
+    Locations without an edited room are shared with the original list, which is left untouched.
+    """
+    updated = []
+    for location in locations:
+        rooms = location.get('rooms', [])
+        if any(id(room) in edited for room in rooms):
+            location = {**location, 'rooms': [edited.get(id(room), room) for room in rooms]}
+        updated.append(location)
+    return updated
+
 @router.put("/room-openings", response_model=RoomOpeningResponse)
 async def update_room_openings(request: RoomOpeningUpdate):
     """Update openings for a specific room and recalculate measurements"""
     try:
-        # Get current measurement data
-        measurements = execute_query(
-            "SELECT * FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (request.session_id,)
-        )
-        
-        if not measurements:
-            raise HTTPException(status_code=404, detail="No measurement data found for session")
-        
-        # Parse current data
-        current_data = json.loads(measurements[0]['parsed_json'])
-        
-        # Find and update the specific room
-        room_updated = False
-        for location in current_data:
-            if location.get('location') == request.location:
-                for room in location.get('rooms', []):
-                    if room.get('name') == request.room_name:
-                        # Update openings
-                        room['openings'] = [
-                            {
-                                "type": opening.type,
-                                "width": opening.width,
-                                "height": opening.height
-                            }
-                            for opening in request.openings
-                        ]
-                        
-                        # Recalculate measurements for this room
-                        from services.room_calculator import RoomCalculator
-                        
-                        # Create room data structure for recalculation
-                        # Try to get original dimensions or calculate from area
-                        floor_area = room['measurements'].get('floor_area_sqft', 100.0)
-                        height = room['measurements'].get('height', 8.0)
-                        
-                        # Try to get original dimensions or estimate from area
-                        original_length = room['measurements'].get('length')
-                        original_width = room['measurements'].get('width')
-                        
-                        if not original_length or not original_width:
-                            # Estimate dimensions from area (assume square room)
-                            original_length = (floor_area ** 0.5)
-                            original_width = (floor_area ** 0.5)
-                        
-                        room_data = {
-                            "name": room['name'],
-                            "raw_dimensions": {
-                                "length": float(original_length),
-                                "width": float(original_width),
-                                "height": float(height),
-                                "area": float(floor_area)
-                            },
-                            "openings": room['openings']
-                        }
-                        
-                        # Recalculate measurements
-                        updated_room = RoomCalculator.calculate_room_measurements(room_data)
-                        room['measurements'] = updated_room['measurements']
-                        
-                        room_updated = True
-                        break
-                
-                if room_updated:
-                    break
-        
-        if not room_updated:
-            raise HTTPException(status_code=404, detail=f"Room '{request.room_name}' not found in location '{request.location}'")
-        
-        # Save updated data back to database
-        execute_update(
-            "UPDATE measurement_data SET parsed_json = ? WHERE session_id = ? AND id = ?",
-            (json.dumps(current_data), request.session_id, measurements[0]['id'])
-        )
-        
-        # Return the updated room data
-        updated_room_data = None
-        for location in current_data:
-            if location.get('location') == request.location:
-                for room in location.get('rooms', []):
-                    if room.get('name') == request.room_name:
-                        updated_room_data = room
-                        break
-                if updated_room_data:
-                    break
+        async with _get_measurement_lock(request.session_id):
+            # Get current measurement data
+            latest = await _get_latest_measurement(request.session_id)
+            
+            if not latest:
+                raise HTTPException(status_code=404, detail="No measurement data found for session")
+            
+            measurement_id, current_data = latest
+            
+            # Find the specific room
+            original = measurement_store.index_rooms(current_data).get((request.location, request.room_name))
+            if original is None:
+                raise HTTPException(status_code=404, detail=f"Room '{request.room_name}' not found in location '{request.location}'")
+            
+            # Edit a copy; readers not holding the lock keep seeing the cached data until the save commits
+            room = copy.deepcopy(original)
+            _apply_room_openings(room, request.openings)
+            
+            # Save only the edited room
+            await asyncio.to_thread(
+                measurement_store.save_room, request.session_id, measurement_id, request.location, request.room_name,
+                room['openings'], room['measurements']
+            )
+            _measurement_cache[request.session_id] = (measurement_id, _replace_rooms(current_data, {id(original): room}))
+            _invalidate_complete_cache(request.session_id)
         
         return RoomOpeningResponse(
             session_id=request.session_id,
             location=request.location,
             room_name=request.room_name,
             openings=request.openings,
-            updated_measurements=updated_room_data['measurements'] if updated_room_data else {}
+            updated_measurements=room['measurements']
         )
         
     except HTTPException:
@@ -520,54 +765,87 @@ async def update_room_openings(request: RoomOpeningUpdate):
         logger.error(f"Openings: {request.openings}")
         raise HTTPException(status_code=500, detail=f"Failed to update room openings: {str(e)}")
 
+@router.put("/room-openings/bulk", response_model=List[RoomOpeningResponse])
+async def update_room_openings_bulk(requests: List[RoomOpeningUpdate]):
+    """Update openings for several rooms of one session and save them together"""
+    if not requests:
+        return []
+    
+    session_id = requests[0].session_id
+    if any(request.session_id != session_id for request in requests):
+        raise HTTPException(status_code=400, detail="All room updates must belong to the same session")
+    
+    try:
+        async with _get_measurement_lock(session_id):
+            # Get current measurement data
+            latest = await _get_latest_measurement(session_id)
+            
+            if not latest:
+                raise HTTPException(status_code=404, detail="No measurement data found for session")
+            
+            measurement_id, current_data = latest
+            rooms_by_key = measurement_store.index_rooms(current_data)
+            
+            # Resolve every room before changing any of them
+            originals = []
+            for request in requests:
+                room = rooms_by_key.get((request.location, request.room_name))
+                if room is None:
+                    raise HTTPException(status_code=404, detail=f"Room '{request.room_name}' not found in location '{request.location}'")
+                originals.append(room)
+            
+            # Edit copies (one per distinct room, so repeated requests build on each other);
+            # readers not holding the lock keep seeing the cached data until the save commits
+            edited = {id(room): copy.deepcopy(room) for room in originals}
+            rooms = [edited[id(room)] for room in originals]
+            for request, room in zip(requests, rooms):
+                _apply_room_openings(room, request.openings)
+            
+            # Save all edited rooms in one transaction
+            await asyncio.to_thread(
+                measurement_store.save_rooms, session_id, measurement_id,
+                [(request.location, request.room_name, room['openings'], room['measurements'])
+                 for request, room in zip(requests, rooms)]
+            )
+            _measurement_cache[session_id] = (measurement_id, _replace_rooms(current_data, edited))
+            _invalidate_complete_cache(session_id)
+        
+        return [
+            RoomOpeningResponse(
+                session_id=session_id,
+                location=request.location,
+                room_name=request.room_name,
+                openings=request.openings,
+                updated_measurements=room['measurements']
+            )
+            for request, room in zip(requests, rooms)
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk updating room openings for session {session_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to update room openings: {str(e)}")
+
 # Project Management Endpoints
 @router.get("/projects", response_model=ProjectListResponse)
 async def get_all_projects():
     """Get all projects (pre-estimate sessions)"""
     try:
-        projects = execute_query(
-            "SELECT * FROM pre_estimate_sessions ORDER BY created_at DESC"
+        cached = _session_response_cache.get(PROJECT_LIST_KEY)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        projects = await async_execute_query(
+            f"SELECT {SESSION_COLUMNS} FROM pre_estimate_sessions ORDER BY created_at DESC"
         )
         
-        project_list = []
-        for project in projects:
-            # Convert sqlite3.Row to dict for easier access
-            project_dict = dict(project)
-            
-            # Build company info
-            company = None
-            if project_dict.get('company_name'):
-                company = CompanyInfo(
-                    name=project_dict['company_name'],
-                    address=project_dict.get('company_address'),
-                    city=project_dict.get('company_city'),
-                    state=project_dict.get('company_state'),
-                    zip=project_dict.get('company_zip'),
-                    phone=project_dict.get('company_phone'),
-                    email=project_dict.get('company_email')
-                )
-            
-            # Handle jobsite - use new structure if available, fallback to old
-            jobsite_value = None
-            if project_dict.get('jobsite_full_address'):
-                jobsite_value = project_dict['jobsite_full_address']
-            elif project_dict.get('jobsite'):
-                jobsite_value = project_dict['jobsite']
-            
-            project_list.append(PreEstimateSessionResponse(
-                id=project_dict['id'],
-                session_id=project_dict['session_id'],
-                status=project_dict['status'],
-                created_at=project_dict['created_at'],
-                updated_at=project_dict['updated_at'],
-                project_name=project_dict['project_name'] if project_dict['project_name'] is not None else None,
-                jobsite=jobsite_value,
-                occupancy=project_dict.get('occupancy'),
-                company=company,
-                kitchen_cabinetry_enabled=bool(project_dict['kitchen_cabinetry_enabled'] if 'kitchen_cabinetry_enabled' in project_dict.keys() else 0)
-            ))
+        # Rows come straight from our own table, so skip per-item model validation
+        project_list = [_build_session_payload(dict(project)) for project in projects]
         
-        return ProjectListResponse(projects=project_list)
+        content = orjson.dumps({"projects": project_list})
+        _session_response_cache[PROJECT_LIST_KEY] = content
+        return Response(content=content, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error getting projects: {e}")
@@ -578,8 +856,8 @@ async def update_project(session_id: str, request: ProjectUpdateRequest):
     """Update project name"""
     try:
         # Check if project exists
-        existing_project = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
+        existing_project = await async_execute_query(
+            "SELECT 1 FROM pre_estimate_sessions WHERE session_id = ? LIMIT 1",
             (session_id,)
         )
         
@@ -618,40 +896,11 @@ async def update_project(session_id: str, request: ProjectUpdateRequest):
         update_fields.append("updated_at = CURRENT_TIMESTAMP")
         update_values.append(session_id)
         
-        query = f"UPDATE pre_estimate_sessions SET {', '.join(update_fields)} WHERE session_id = ?"
-        execute_update(query, tuple(update_values))
+        query = f"UPDATE pre_estimate_sessions SET {', '.join(update_fields)} WHERE session_id = ? RETURNING {SESSION_COLUMNS}"
+        updated_project = await async_execute_returning(query, tuple(update_values))
+        _invalidate_session_cache(session_id)
         
-        # Get updated project
-        updated_project = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )[0]
-        
-        # Build company info
-        company = None
-        if updated_project.get('company_name'):
-            company = CompanyInfo(
-                name=updated_project['company_name'],
-                address=updated_project.get('company_address'),
-                city=updated_project.get('company_city'),
-                state=updated_project.get('company_state'),
-                zip=updated_project.get('company_zip'),
-                phone=updated_project.get('company_phone'),
-                email=updated_project.get('company_email')
-            )
-        
-        return PreEstimateSessionResponse(
-            id=updated_project['id'],
-            session_id=updated_project['session_id'],
-            status=updated_project['status'],
-            created_at=updated_project['created_at'],
-            updated_at=updated_project['updated_at'],
-            project_name=updated_project['project_name'],
-            jobsite=updated_project.get('jobsite'),
-            occupancy=updated_project.get('occupancy'),
-            company=company,
-            kitchen_cabinetry_enabled=bool(updated_project['kitchen_cabinetry_enabled'] if 'kitchen_cabinetry_enabled' in updated_project.keys() else 0)
-        )
+        return _build_session_model(dict(updated_project))
         
     except HTTPException:
         raise
@@ -664,35 +913,21 @@ async def delete_project(session_id: str):
     """Delete a project and all related data"""
     try:
         # Check if project exists
-        existing_project = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
+        existing_project = await async_execute_query(
+            "SELECT 1 FROM pre_estimate_sessions WHERE session_id = ? LIMIT 1",
             (session_id,)
         )
         
         if not existing_project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        # Delete related data first (due to foreign key constraints)
-        execute_update(
-            "DELETE FROM measurement_data WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        execute_update(
-            "DELETE FROM demo_scope_data WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        execute_update(
-            "DELETE FROM work_scope_data WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        # Delete the project
-        execute_update(
-            "DELETE FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
+        # A pending material scope save must not write its row after the project is gone
+        async with _get_material_save_lock(session_id), _get_measurement_lock(session_id):
+            _drop_pending_material_scope(session_id)
+            await asyncio.to_thread(_delete_project_rows, session_id)
+            _invalidate_measurement_cache(session_id)
+        _invalidate_session_cache(session_id)
+        _invalidate_saved_cache(session_id)
         
         return {"message": "Project deleted successfully"}
         
@@ -707,25 +942,23 @@ async def get_final_estimate(session_id: str):
     """Generate final estimate JSON combining all data sources"""
     try:
         # Generate final estimate
-        final_data = final_estimate_service.generate_final_estimate(session_id)
+        final_data = await asyncio.to_thread(final_estimate_service.generate_final_estimate, session_id)
         
         # Save to file for download
-        import os
-        os.makedirs("outputs", exist_ok=True)
-        
         filename = f"final_estimate_{session_id}.json"
-        filepath = os.path.join("outputs", filename)
+        filepath = file_service.output_path(filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False, default=str)
+        # Encode once; the same bytes go to the download file and into the response
+        data_json = await asyncio.to_thread(
+            _write_json_output, filepath, final_data, OUTPUT_JSON_OPTION | orjson.OPT_INDENT_2
+        )
         
         # Generate download URL
         download_url = f"/api/pre-estimate/download/{filename}"
         
-        return FinalEstimateResponse(
-            success=True,
-            data=final_data,
-            download_url=download_url
+        return Response(
+            content=b'{"success":true,"data":' + data_json + b',"download_url":' + orjson.dumps(download_url) + b'}',
+            media_type="application/json"
         )
         
     except ValueError as e:
@@ -735,28 +968,32 @@ async def get_final_estimate(session_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to generate final estimate: {str(e)}")
 
 @router.get("/demolition-scope/{session_id}")
-async def get_demolition_scope(session_id: str):
-    """Generate demolition scope JSON by combining Material Scope and Demo Scope data"""
+async def get_demolition_scope(session_id: str, pretty: bool = False):
+    """Generate demolition scope JSON by combining Material Scope and Demo Scope data
+    
+    The download file is compact JSON unless pretty=true is given; the response
+    only carries its download URL.
+    """
     try:
+        # The scope is built from the material scope, so write any pending save first
+        await _flush_material_scope(session_id)
+        
         # Generate demolition scope
-        demolition_data = demolition_scope_service.generate_demolition_scope(session_id)
+        demolition_data = await asyncio.to_thread(demolition_scope_service.generate_demolition_scope, session_id)
         
         # Save to file for download
-        import os
-        os.makedirs("outputs", exist_ok=True)
-        
         filename = f"demolition_scope_{session_id}.json"
-        filepath = os.path.join("outputs", filename)
+        filepath = file_service.output_path(filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(demolition_data, f, indent=2, ensure_ascii=False, default=str)
+        option = OUTPUT_JSON_OPTION | orjson.OPT_INDENT_2 if pretty else OUTPUT_JSON_OPTION
+        await asyncio.to_thread(_write_json_output, filepath, demolition_data, option)
         
         # Generate download URL
         download_url = f"/api/pre-estimate/download/{filename}"
         
+        # The scope itself is only served through the streamed download
         return {
             "success": True,
-            "data": demolition_data,
             "download_url": download_url,
             "message": "Demolition scope generated successfully"
         }
@@ -796,67 +1033,133 @@ async def clear_measurement_progress(session_id: str):
 @router.get("/download/{filename}")
 async def download_final_estimate(filename: str):
     """Download final estimate JSON file"""
-    import os
-    from fastapi.responses import FileResponse
-    
-    filepath = os.path.join("outputs", filename)
+    filepath = file_service.output_path(filename)
     
-    if not os.path.exists(filepath):
+    # One stat off the event loop doubles as the existence check; FileResponse reuses it
+    try:
+        stat_result = await asyncio.to_thread(os.stat, filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
+    # filename= makes FileResponse send the attachment Content-Disposition header itself
     return FileResponse(
         path=filepath,
         filename=filename,
         media_type='application/json',
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
+        stat_result=stat_result
     )
 
+# Material scope auto-saves arrive on nearly every edit; the latest one per session
+# is held back briefly so a burst of them becomes a single write
+MATERIAL_SCOPE_SAVE_DELAY = 0.5
+# A write that failed stays pending and is retried after this many seconds
+MATERIAL_SCOPE_RETRY_DELAY = 5.0
+_pending_material_saves: Dict[str, Tuple[asyncio.TimerHandle, Dict[str, Any]]] = {}
+_material_save_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+_material_save_tasks: set = set()
+
+def _get_material_save_lock(session_id: str) -> asyncio.Lock:
+    """Get the lock keeping a session's material scope writes in order"""
+    lock = _material_save_locks.get(session_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _material_save_locks[session_id] = lock
+    return lock
+
+def _schedule_material_scope_save(session_id: str, data: Dict[str, Any], delay: float = MATERIAL_SCOPE_SAVE_DELAY):
+    """Replace the session's pending material scope save and restart its delay"""
+    pending = _pending_material_saves.get(session_id)
+    if pending is not None:
+        pending[0].cancel()
+    
+    timer = asyncio.get_running_loop().call_later(delay, _start_material_scope_flush, session_id)
+    _pending_material_saves[session_id] = (timer, data)
+
+def _drop_pending_material_scope(session_id: str):
+    """Cancel the session's pending material scope save without writing it"""
+    pending = _pending_material_saves.pop(session_id, None)
+    if pending is not None:
+        pending[0].cancel()
+
+def _start_material_scope_flush(session_id: str):
+    """Timer callback writing a session's pending material scope save"""
+    task = asyncio.create_task(_flush_material_scope_in_background(session_id))
+    _material_save_tasks.add(task)
+    task.add_done_callback(_material_save_tasks.discard)
+
+async def _flush_material_scope_in_background(session_id: str):
+    """Timer-driven flush; a failed write is already queued for retry, so it is only logged"""
+    try:
+        await _flush_material_scope(session_id)
+    except Exception as e:
+        logger.error(f"Error writing material scope for session {session_id}, retrying in {MATERIAL_SCOPE_RETRY_DELAY}s: {e}")
+
+async def _flush_material_scope(session_id: str):
+    """Write the session's pending material scope save, if any
+    
+    Readers call this first so they never see data older than the last accepted save;
+    holding the lock also makes them wait for a write that is already running. A failed
+    write stays pending for a retry, unless a newer save replaced it meanwhile, and the
+    error is raised so a reader reports it instead of returning the older stored data.
+    """
+    async with _get_material_save_lock(session_id):
+        pending = _pending_material_saves.pop(session_id, None)
+        if pending is None:
+            return
+        
+        timer, data = pending
+        timer.cancel()
+        try:
+            # Insert or update the session's material scope row in one statement,
+            # writing nothing when the session has been deleted meanwhile
+            await async_execute_update(
+                """INSERT INTO material_scope_data 
+                   (session_id, scope_data, room_openings, merged_rooms) 
+                   SELECT ?, ?, ?, ?
+                   WHERE EXISTS (SELECT 1 FROM pre_estimate_sessions WHERE session_id = ?)
+                   ON CONFLICT(session_id) DO UPDATE SET
+                       scope_data = excluded.scope_data,
+                       room_openings = excluded.room_openings,
+                       merged_rooms = excluded.merged_rooms,
+                       updated_at = CURRENT_TIMESTAMP""",
+                (session_id, _dumps(data.get('scopeData', {})),
+                 _dumps(data.get('roomOpenings', {})), _dumps(data.get('mergedRooms', {})), session_id)
+            )
+        except Exception:
+            if session_id not in _pending_material_saves:
+                _schedule_material_scope_save(session_id, data, MATERIAL_SCOPE_RETRY_DELAY)
+            raise
+        finally:
+            _invalidate_saved_cache(session_id, 'material-scope')
+
+async def flush_pending_auto_saves():
+    """Write every pending material scope save; called on shutdown"""
+    results = await asyncio.gather(
+        *(_flush_material_scope(session_id) for session_id in list(_pending_material_saves)),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Material scope auto-save lost on shutdown: {result}")
+
 # Auto-save endpoints
-@router.put("/auto-save/material-scope/{session_id}")
-async def auto_save_material_scope(session_id: str, data: dict):
-    """Auto-save material scope data"""
+@router.put("/auto-save/material-scope/{session_id}", status_code=202)
+async def auto_save_material_scope(session_id: str, request: Request):
+    """Auto-save material scope data
+    
+    The write is deferred by MATERIAL_SCOPE_SAVE_DELAY seconds and superseded by
+    any newer save of the same session arriving in the meantime. A failed write is
+    retried, and GET answers 503 until it succeeds.
+    """
     try:
         # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
+        if not await _session_exists(session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Extract data
-        scope_data = json.dumps(data.get('scopeData', {}))
-        room_openings = json.dumps(data.get('roomOpenings', {}))
-        merged_rooms = json.dumps(data.get('mergedRooms', {}))
-        
-        # Check if material scope data exists
-        existing_data = execute_query(
-            "SELECT * FROM material_scope_data WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if existing_data:
-            # Update existing data
-            execute_update(
-                """UPDATE material_scope_data 
-                   SET scope_data = ?, room_openings = ?, merged_rooms = ?, 
-                       updated_at = CURRENT_TIMESTAMP 
-                   WHERE session_id = ?""",
-                (scope_data, room_openings, merged_rooms, session_id)
-            )
-        else:
-            # Insert new data
-            execute_insert(
-                """INSERT INTO material_scope_data 
-                   (session_id, scope_data, room_openings, merged_rooms) 
-                   VALUES (?, ?, ?, ?)""",
-                (session_id, scope_data, room_openings, merged_rooms)
-            )
+        data = _parse_json_object(await request.body())
+        _schedule_material_scope_save(session_id, data)
         
-        return {"success": True, "message": "Material scope auto-saved"}
+        return {"success": True, "message": "Material scope auto-save accepted"}
         
     except HTTPException:
         raise
@@ -868,9 +1171,20 @@ async def auto_save_material_scope(session_id: str, data: dict):
 async def get_saved_material_scope(session_id: str):
     """Get saved material scope data"""
     try:
+        try:
+            await _flush_material_scope(session_id)
+        except Exception as e:
+            logger.error(f"Error writing material scope for session {session_id}: {e}")
+            raise HTTPException(status_code=503, detail="The latest material scope auto-save could not be written yet")
+        
+        cached = _saved_cache.get(('material-scope', session_id))
+        if cached is not None:
+            return cached
+        generation = _saved_generation('material-scope', session_id)
+        
         # Get saved data
-        saved_data = execute_query(
-            "SELECT * FROM material_scope_data WHERE session_id = ?",
+        saved_data = await async_execute_query(
+            "SELECT scope_data, room_openings, merged_rooms, updated_at FROM material_scope_data WHERE session_id = ?",
             (session_id,)
         )
         
@@ -878,13 +1192,17 @@ async def get_saved_material_scope(session_id: str):
             return {"scopeData": {}, "roomOpenings": {}, "mergedRooms": {}}
         
         data = saved_data[0]
-        return {
-            "scopeData": json.loads(data['scope_data']) if data['scope_data'] else {},
-            "roomOpenings": json.loads(data['room_openings']) if data['room_openings'] else {},
-            "mergedRooms": json.loads(data['merged_rooms']) if data['merged_rooms'] else {},
+        result = {
+            "scopeData": _loads(data['scope_data']) if data['scope_data'] else {},
+            "roomOpenings": _loads(data['room_openings']) if data['room_openings'] else {},
+            "mergedRooms": _loads(data['merged_rooms']) if data['merged_rooms'] else {},
             "lastSaved": data['updated_at']
         }
+        _store_saved('material-scope', session_id, generation, result)
+        return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting saved material scope: {e}")
         raise HTTPException(status_code=500, detail="Failed to get saved material scope")
@@ -894,19 +1212,15 @@ async def update_kitchen_cabinetry_status(session_id: str, enabled: bool):
     """Update kitchen cabinetry enabled status"""
     try:
         # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
+        if not await _session_exists(session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Update kitchen cabinetry enabled status
-        execute_update(
+        await async_execute_update(
             "UPDATE pre_estimate_sessions SET kitchen_cabinetry_enabled = ?, updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
             (1 if enabled else 0, session_id)
         )
+        _invalidate_session_cache(session_id)
         
         return {"success": True, "message": "Kitchen cabinetry status updated", "enabled": enabled}
         
@@ -915,44 +1229,29 @@ async def update_kitchen_cabinetry_status(session_id: str, enabled: bool):
         raise HTTPException(status_code=500, detail="Failed to update kitchen cabinetry status")
 
 @router.put("/auto-save/progress/{session_id}")
-async def auto_save_progress(session_id: str, data: dict):
+async def auto_save_progress(session_id: str, request: Request):
     """Auto-save progress data"""
     try:
-        # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
+        data = _parse_json_object(await request.body())
         current_step = data.get('currentStep', '')
-        step_statuses = json.dumps(data.get('stepStatuses', {}))
-        
-        # Check if progress data exists
-        existing_progress = execute_query(
-            "SELECT * FROM pre_estimate_progress WHERE session_id = ?",
-            (session_id,)
+        step_statuses = _dumps(data.get('stepStatuses', {}))
+        
+        # Insert or update the session's progress row in one statement,
+        # writing nothing when the session does not exist
+        saved = await async_execute_update(
+            """INSERT INTO pre_estimate_progress 
+               (session_id, current_step, step_statuses) 
+               SELECT ?, ?, ?
+               WHERE EXISTS (SELECT 1 FROM pre_estimate_sessions WHERE session_id = ?)
+               ON CONFLICT(session_id) DO UPDATE SET
+                   current_step = excluded.current_step,
+                   step_statuses = excluded.step_statuses,
+                   last_saved_at = CURRENT_TIMESTAMP""",
+            (session_id, current_step, step_statuses, session_id)
         )
-        
-        if existing_progress:
-            # Update existing progress
-            execute_update(
-                """UPDATE pre_estimate_progress 
-                   SET current_step = ?, step_statuses = ?, 
-                       last_saved_at = CURRENT_TIMESTAMP 
-                   WHERE session_id = ?""",
-                (current_step, step_statuses, session_id)
-            )
-        else:
-            # Insert new progress
-            execute_insert(
-                """INSERT INTO pre_estimate_progress 
-                   (session_id, current_step, step_statuses) 
-                   VALUES (?, ?, ?)""",
-                (session_id, current_step, step_statuses)
-            )
+        if not saved:
+            raise HTTPException(status_code=404, detail="Session not found")
+        _invalidate_saved_cache(session_id, 'progress')
         
         return {"success": True, "message": "Progress auto-saved"}
         
@@ -966,9 +1265,14 @@ async def auto_save_progress(session_id: str, data: dict):
 async def get_saved_progress(session_id: str):
     """Get saved progress data"""
     try:
+        cached = _saved_cache.get(('progress', session_id))
+        if cached is not None:
+            return cached
+        generation = _saved_generation('progress', session_id)
+        
         # Get saved progress
-        saved_progress = execute_query(
-            "SELECT * FROM pre_estimate_progress WHERE session_id = ?",
+        saved_progress = await async_execute_query(
+            "SELECT current_step, step_statuses, last_saved_at FROM pre_estimate_progress WHERE session_id = ?",
             (session_id,)
         )
         
@@ -976,45 +1280,55 @@ async def get_saved_progress(session_id: str):
             return {"currentStep": "", "stepStatuses": {}}
         
         progress = saved_progress[0]
-        return {
+        result = {
             "currentStep": progress['current_step'] or "",
-            "stepStatuses": json.loads(progress['step_statuses']) if progress['step_statuses'] else {},
+            "stepStatuses": _loads(progress['step_statuses']) if progress['step_statuses'] else {},
             "lastSaved": progress['last_saved_at']
         }
+        _store_saved('progress', session_id, generation, result)
+        return result
         
     except Exception as e:
         logger.error(f"Error getting saved progress: {e}")
         raise HTTPException(status_code=500, detail="Failed to get saved progress")
 
+async def _read_measurement_edits(request: Request) -> List[Dict[str, Any]]:
+    """Parse the edited locations of a measurement save body straight from its bytes
+    
+    Skips building a MeasurementSaveRequest model for what can be a multi-MB payload;
+    only the shape the store relies on is checked.
+    """
+    locations = _parse_json_object(await request.body()).get('measurementData')
+    if not locations:
+        raise HTTPException(status_code=400, detail="measurementData is required")
+    if not isinstance(locations, list) or not all(isinstance(location, dict) for location in locations):
+        raise HTTPException(status_code=400, detail="measurementData must be a list of locations")
+    return locations
+
+async def _replace_measurement_edits(session_id: str, edited_data: List[Dict[str, Any]]) -> int:
+    """Overwrite the latest measurement record with edited data and cache the result"""
+    async with _get_measurement_lock(session_id):
+        # Update the latest measurement record with edits in one transaction
+        measurement_id = await asyncio.to_thread(measurement_store.replace_latest, session_id, edited_data)
+        
+        if measurement_id is None:
+            raise HTTPException(status_code=404, detail="No measurement data found")
+        
+        # The replace dropped all room overrides, so the edited data is the stored state
+        _measurement_cache[session_id] = (measurement_id, edited_data)
+        _invalidate_complete_cache(session_id)
+    return measurement_id
+
 @router.put("/auto-save/measurement/{session_id}")
-async def auto_save_measurement_edits(session_id: str, request: MeasurementSaveRequest):
+async def auto_save_measurement_edits(session_id: str, request: Request):
     """Auto-save measurement data edits (room merges, opening updates)"""
     try:
         logger.info(f"Auto-saving measurement edits for session {session_id}")
-        logger.debug(f"Request data: {request}")
-        
-        # Validate request data
-        if not request.measurementData:
-            raise HTTPException(status_code=400, detail="measurementData is required")
         
-        # Get current measurement data
-        measurements = execute_query(
-            "SELECT * FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
+        edited_data = await _read_measurement_edits(request)
+        measurement_id = await _replace_measurement_edits(session_id, edited_data)
         
-        if not measurements:
-            raise HTTPException(status_code=404, detail="No measurement data found")
-        
-        # Update the measurement data with edits
-        edited_data = request.measurementData
-        
-        logger.debug(f"Updating measurement data for session {session_id}, record ID: {measurements[0]['id']}")
-        
-        execute_update(
-            "UPDATE measurement_data SET parsed_json = ? WHERE session_id = ? AND id = ?",
-            (json.dumps(edited_data), session_id, measurements[0]['id'])
-        )
+        logger.debug("Updated measurement data for session %s, record ID: %s", session_id, measurement_id)
         
         logger.info(f"Successfully auto-saved measurement edits for session {session_id}")
         return {"success": True, "message": "Measurement edits auto-saved"}
@@ -1023,38 +1337,18 @@ async def auto_save_measurement_edits(session_id: str, request: MeasurementSaveR
         raise
     except Exception as e:
         logger.error(f"Error auto-saving measurement edits for session {session_id}: {e}")
-        logger.error(f"Request data was: {request}")
         raise HTTPException(status_code=500, detail=f"Failed to auto-save measurement edits: {str(e)}")
 
 @router.put("/measurement/save/{session_id}")
-async def save_measurement_edits(session_id: str, request: MeasurementSaveRequest):
+async def save_measurement_edits(session_id: str, request: Request):
     """Save measurement data edits (manual save)"""
     try:
         logger.info(f"Saving measurement edits for session {session_id}")
-        logger.debug(f"Request data: {request}")
         
-        # Validate request data
-        if not request.measurementData:
-            raise HTTPException(status_code=400, detail="measurementData is required")
+        edited_data = await _read_measurement_edits(request)
+        measurement_id = await _replace_measurement_edits(session_id, edited_data)
         
-        # Get current measurement data
-        measurements = execute_query(
-            "SELECT * FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
-        
-        if not measurements:
-            raise HTTPException(status_code=404, detail="No measurement data found")
-        
-        # Update the measurement data with edits
-        edited_data = request.measurementData
-        
-        logger.debug(f"Updating measurement data for session {session_id}, record ID: {measurements[0]['id']}")
-        
-        execute_update(
-            "UPDATE measurement_data SET parsed_json = ? WHERE session_id = ? AND id = ?",
-            (json.dumps(edited_data), session_id, measurements[0]['id'])
-        )
+        logger.debug("Updated measurement data for session %s, record ID: %s", session_id, measurement_id)
         
         logger.info(f"Successfully saved measurement edits for session {session_id}")
         return {"success": True, "message": "Measurement edits saved successfully"}
@@ -1063,43 +1357,25 @@ async def save_measurement_edits(session_id: str, request: MeasurementSaveReques
         raise
     except Exception as e:
         logger.error(f"Error saving measurement edits for session {session_id}: {e}")
-        logger.error(f"Request data was: {request}")
         raise HTTPException(status_code=500, detail=f"Failed to save measurement edits: {str(e)}")
 
 # Demo Scope Auto-save endpoints
 @router.put("/auto-save/demo-scope/{session_id}")
-async def auto_save_demo_scope(session_id: str, data: dict):
+async def auto_save_demo_scope(session_id: str, request: Request):
     """Auto-save demo scope data"""
     try:
         # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
+        if not await _session_exists(session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
-        demo_scope_data = json.dumps(data)
-        
-        # Check if demo scope data exists
-        existing_demo = execute_query(
-            "SELECT * FROM demo_scope_data WHERE session_id = ?",
-            (session_id,)
-        )
+        # The body is stored as sent; parsing it only validates it
+        body = await request.body()
+        _parse_json_object(body)
+        demo_scope_data = body.decode()
         
-        if existing_demo:
-            # Update existing demo scope data
-            execute_update(
-                "UPDATE demo_scope_data SET parsed_json = ? WHERE session_id = ?",
-                (demo_scope_data, session_id)
-            )
-        else:
-            # Insert new demo scope data
-            execute_insert(
-                "INSERT INTO demo_scope_data (session_id, parsed_json) VALUES (?, ?)",
-                (session_id, demo_scope_data)
-            )
+        await asyncio.to_thread(_save_demo_scope_rows, session_id, demo_scope_data)
+        _invalidate_complete_cache(session_id)
+        _invalidate_saved_cache(session_id, 'demo-scope')
         
         return {"success": True, "message": "Demo scope auto-saved"}
         
@@ -1113,27 +1389,32 @@ async def auto_save_demo_scope(session_id: str, data: dict):
 async def get_saved_demo_scope(session_id: str):
     """Get saved demo scope data"""
     try:
-        # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
+        cached = _saved_cache.get(('demo-scope', session_id))
+        if cached is not None:
+            return cached
+        generation = _saved_generation('demo-scope', session_id)
+        
+        # The session side of the join tells a missing session (no row) from missing data (NULL id)
+        demo_scope = await async_execute_query(
+            """SELECT d.id, d.parsed_json, d.created_at
+               FROM pre_estimate_sessions s
+               LEFT JOIN demo_scope_data d ON d.session_id = s.session_id
+               WHERE s.session_id = ?""",
             (session_id,)
         )
         
-        if not sessions:
+        if not demo_scope:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        demo_scope = execute_query(
-            "SELECT * FROM demo_scope_data WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if demo_scope:
+        if demo_scope[0]['id'] is not None:
             parsed_data = demo_scope[0]['parsed_json']
-            return {
+            result = {
                 "success": True,
-                "demoScopeData": json.loads(parsed_data) if parsed_data else {},
+                "demoScopeData": _loads(parsed_data) if parsed_data else {},
                 "lastUpdated": demo_scope[0]['created_at']  # Use created_at since there's no updated_at column
             }
+            _store_saved('demo-scope', session_id, generation, result)
+            return result
         else:
             return {
                 "success": True,
@@ -1158,7 +1439,8 @@ async def calculate_partial_area(request: AreaCalculationRequest):
         
         # Use AI service to calculate area from description
         logger.info("🚀 Calling AI service for area calculation...")
-        calculated_area = ai_service.calculate_area_from_description(
+        calculated_area = await asyncio.to_thread(
+            ai_service.calculate_area_from_description,
             description=request.description,
             surface_type=request.surface_type,
             existing_dimensions=request.existing_dimensions
@@ -1183,46 +1465,32 @@ async def calculate_partial_area(request: AreaCalculationRequest):
 
 # Kitchen Cabinetry Auto-save endpoints
 @router.put("/auto-save/kitchen-cabinetry/{session_id}")
-async def auto_save_kitchen_cabinetry(session_id: str, data: dict):
+async def auto_save_kitchen_cabinetry(session_id: str, request: Request):
     """Auto-save kitchen cabinetry data"""
     try:
-        # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
         # Extract data
-        kitchen_data = json.dumps(data.get('kitchenData', {}))
-        uploaded_images = json.dumps(data.get('uploadedImages', []))
-        analysis_results = json.dumps(data.get('analysisResults', {}))
-        
-        # Check if kitchen cabinetry data exists
-        existing_data = execute_query(
-            "SELECT * FROM kitchen_cabinetry_data WHERE session_id = ?",
-            (session_id,)
+        data = _parse_json_object(await request.body())
+        kitchen_data = _dumps(data.get('kitchenData', {}))
+        uploaded_images = _dumps(data.get('uploadedImages', []))
+        analysis_results = _dumps(data.get('analysisResults', {}))
+        
+        # Insert or update the session's kitchen cabinetry row in one statement,
+        # writing nothing when the session does not exist
+        saved = await async_execute_update(
+            """INSERT INTO kitchen_cabinetry_data 
+               (session_id, kitchen_data, uploaded_images, analysis_results) 
+               SELECT ?, ?, ?, ?
+               WHERE EXISTS (SELECT 1 FROM pre_estimate_sessions WHERE session_id = ?)
+               ON CONFLICT(session_id) DO UPDATE SET
+                   kitchen_data = excluded.kitchen_data,
+                   uploaded_images = excluded.uploaded_images,
+                   analysis_results = excluded.analysis_results,
+                   updated_at = CURRENT_TIMESTAMP""",
+            (session_id, kitchen_data, uploaded_images, analysis_results, session_id)
         )
-        
-        if existing_data:
-            # Update existing data
-            execute_update(
-                """UPDATE kitchen_cabinetry_data 
-                   SET kitchen_data = ?, uploaded_images = ?, analysis_results = ?, 
-                       updated_at = CURRENT_TIMESTAMP 
-                   WHERE session_id = ?""",
-                (kitchen_data, uploaded_images, analysis_results, session_id)
-            )
-        else:
-            # Insert new data
-            execute_insert(
-                """INSERT INTO kitchen_cabinetry_data 
-                   (session_id, kitchen_data, uploaded_images, analysis_results) 
-                   VALUES (?, ?, ?, ?)""",
-                (session_id, kitchen_data, uploaded_images, analysis_results)
-            )
+        if not saved:
+            raise HTTPException(status_code=404, detail="Session not found")
+        _invalidate_saved_cache(session_id, 'kitchen-cabinetry')
         
         return {"success": True, "message": "Kitchen cabinetry auto-saved"}
         
@@ -1237,17 +1505,17 @@ async def get_saved_kitchen_cabinetry(session_id: str):
     """Get saved kitchen cabinetry data"""
     try:
         # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
+        if not await _session_exists(session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
+        cached = _saved_cache.get(('kitchen-cabinetry', session_id))
+        if cached is not None:
+            return cached
+        generation = _saved_generation('kitchen-cabinetry', session_id)
+        
         # Get saved data
-        saved_data = execute_query(
-            "SELECT * FROM kitchen_cabinetry_data WHERE session_id = ?",
+        saved_data = await async_execute_query(
+            "SELECT kitchen_data, uploaded_images, analysis_results, updated_at FROM kitchen_cabinetry_data WHERE session_id = ?",
             (session_id,)
         )
         
@@ -1262,15 +1530,17 @@ async def get_saved_kitchen_cabinetry(session_id: str):
             }
         
         data = saved_data[0]
-        return {
+        result = {
             "success": True,
             "data": {
-                "kitchenData": json.loads(data['kitchen_data']) if data['kitchen_data'] else {},
-                "uploadedImages": json.loads(data['uploaded_images']) if data['uploaded_images'] else [],
-                "analysisResults": json.loads(data['analysis_results']) if data['analysis_results'] else {}
+                "kitchenData": _loads(data['kitchen_data']) if data['kitchen_data'] else {},
+                "uploadedImages": _loads(data['uploaded_images']) if data['uploaded_images'] else [],
+                "analysisResults": _loads(data['analysis_results']) if data['analysis_results'] else {}
             },
             "lastSaved": data['updated_at']
         }
+        _store_saved('kitchen-cabinetry', session_id, generation, result)
+        return result
         
     except HTTPException:
         raise
@@ -1289,12 +1559,7 @@ async def analyze_kitchen_images(
         logger.info(f"Received {len(images)} images for analysis")
         
         # Check if session exists
-        sessions = execute_query(
-            "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        
-        if not sessions:
+        if not await _session_exists(session_id):
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Process each image
@@ -1351,11 +1616,11 @@ async def analyze_kitchen_images(
                 """
                 
                 # Convert image to base64 for AI analysis
-                import base64
                 image_base64 = base64.b64encode(image_data).decode('utf-8')
                 
                 # Use AI service to analyze the image
-                ai_analysis = ai_service.analyze_kitchen_image(
+                ai_analysis = await asyncio.to_thread(
+                    ai_service.analyze_kitchen_image,
                     image_base64, 
                     kitchen_analysis_prompt
                 )
@@ -1388,30 +1653,31 @@ async def analyze_kitchen_images(
         }
         
         # Update kitchen cabinetry data with analysis results
-        existing_data = execute_query(
-            "SELECT * FROM kitchen_cabinetry_data WHERE session_id = ?",
+        existing_data = await async_execute_query(
+            "SELECT kitchen_data, uploaded_images FROM kitchen_cabinetry_data WHERE session_id = ?",
             (session_id,)
         )
         
         if existing_data:
             # Update existing data with analysis results
-            current_kitchen_data = json.loads(existing_data[0]['kitchen_data']) if existing_data[0]['kitchen_data'] else {}
-            current_uploaded_images = json.loads(existing_data[0]['uploaded_images']) if existing_data[0]['uploaded_images'] else []
+            current_kitchen_data = _loads(existing_data[0]['kitchen_data']) if existing_data[0]['kitchen_data'] else {}
+            current_uploaded_images = _loads(existing_data[0]['uploaded_images']) if existing_data[0]['uploaded_images'] else []
             
-            execute_update(
+            await async_execute_update(
                 """UPDATE kitchen_cabinetry_data 
                    SET analysis_results = ?, updated_at = CURRENT_TIMESTAMP 
                    WHERE session_id = ?""",
-                (json.dumps(analysis_data), session_id)
+                (_dumps(analysis_data), session_id)
             )
         else:
             # Insert new data with analysis results
-            execute_insert(
+            await async_execute_insert(
                 """INSERT INTO kitchen_cabinetry_data 
                    (session_id, kitchen_data, uploaded_images, analysis_results) 
                    VALUES (?, ?, ?, ?)""",
-                (session_id, "{}", "[]", json.dumps(analysis_data))
+                (session_id, "{}", "[]", _dumps(analysis_data))
             )
+        _invalidate_saved_cache(session_id, 'kitchen-cabinetry')
         
         logger.info(f"Kitchen cabinetry analysis completed for session {session_id}")
         
@@ -4,21 +4,28 @@ Enhanced Demo Analysis router with RAG integration and before/after comparison
 
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict, Any
-import uuid
+from typing import List, Optional, Dict, Any, BinaryIO, Tuple
+import secrets
 import json
+import orjson
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 import os
+import copy
 import base64
+import hashlib
+import functools
 from io import BytesIO
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from cachetools import TTLCache
 
 from config import settings
 from PIL import Image
 from utils.logger import logger
-from models.database import execute_insert, execute_query, execute_update
+from models.database import async_execute_insert, execute_insert, execute_query, execute_update
 from services.ai_service import ai_service
+from services.file_service import file_service
 
 # Import RAG service
 try:
@@ -30,6 +37,131 @@ except ImportError:
 
 router = APIRouter(prefix="/api/rag-demo-analysis", tags=["rag-demo-analysis"])
 
+def _dumps(value: Any) -> str:
+    """Serialize a value to compact JSON text for TEXT columns and prompts"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# Process pool for CPU-bound image resizing and re-encoding, created on first use
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_image_pool() -> ProcessPoolExecutor:
+    """Get the shared image encoding process pool"""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _image_pool
+
+def shutdown_image_pool():
+    """Shut down the image encoding process pool"""
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _image_pool = None
+
+# Analysis rows (and deferred syntheses) are finished after the response is sent;
+# references keep the tasks alive
+_store_tasks: set = set()
+
+# Row inserts still running, by analysis id, so lookups of a just-returned id can wait for them
+_pending_stores: Dict[str, asyncio.Task] = {}
+
+# Deferred multi-stage syntheses by analysis id, polled through GET .../synthesis
+_synthesis_tasks: TTLCache = TTLCache(maxsize=256, ttl=3600)
+
+def _store_in_background(store: Any, analysis_id: Optional[str] = None) -> asyncio.Task:
+    """Run a coroutine without holding up the response; it logs its own failures
+    
+    Pass the analysis id of a row insert so wait_for_analysis_store can find it.
+    """
+    task = asyncio.create_task(store)
+    _store_tasks.add(task)
+    task.add_done_callback(_store_tasks.discard)
+    if analysis_id is not None:
+        _pending_stores[analysis_id] = task
+        task.add_done_callback(lambda _: _pending_stores.pop(analysis_id, None))
+    return task
+
+async def wait_for_analysis_store(analysis_id: str):
+    """Wait until the row of an analysis answered by this router is written
+    
+    The response carries the analysis id before its row exists, so endpoints looking
+    the id up call this first instead of answering 404. A deferred multi-stage analysis
+    is stored once its synthesis finishes, so that is waited for too.
+    """
+    synthesis = _synthesis_tasks.get(analysis_id)
+    if synthesis is not None:
+        await asyncio.shield(synthesis)
+    store = _pending_stores.get(analysis_id)
+    if store is not None:
+        await asyncio.shield(store)
+
+async def flush_pending_stores():
+    """Wait for analysis rows still being written; called on shutdown"""
+    await asyncio.gather(*_store_tasks, return_exceptions=True)
+
+# Results of the multi-stage analysis AI calls, so retries with the same photos and
+# room context skip the model: (stage, input digest) -> stage result
+_stage_cache: TTLCache = TTLCache(maxsize=256, ttl=3600)
+
+def _stage_digest(value: Any, digest: Any):
+    """Feed a stage input into a digest; processed images count by their content-addressed path only"""
+    if isinstance(value, list) and value and isinstance(value[0], dict) and 'path' in value[0]:
+        for img in value:
+            digest.update(img['path'].encode())
+            digest.update(b'\0')
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    digest.update(b'\1')
+
+class _Degraded:
+    """A stage result built from a mock or default structure instead of a model answer
+    
+    _cached_stage unwraps it for the caller and never stores it, so a retry after the
+    provider recovers asks the model again.
+    """
+    __slots__ = ('result',)
+    
+    def __init__(self, result: Any):
+        self.result = result
+
+def _cached_stage(stage: str):
+    """Memoize an analysis stage coroutine by the content of its inputs; None and _Degraded results are not stored"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            digest = hashlib.sha256()
+            for value in args:
+                _stage_digest(value, digest)
+            for name in sorted(kwargs):
+                digest.update(name.encode())
+                _stage_digest(kwargs[name], digest)
+            key = (stage, digest.hexdigest())
+            
+            cached = _stage_cache.get(key)
+            if cached is not None:
+                logger.info(f"Reusing cached {stage} result")
+                return copy.deepcopy(cached)
+            
+            result = await func(*args, **kwargs)
+            if isinstance(result, _Degraded):
+                return result.result
+            if result is not None:
+                _stage_cache[key] = copy.deepcopy(result)
+            return result
+        return wrapper
+    return decorator
+
+# /rag/query results, so repeated searches skip embedding and vector search; cleared when
+# feedback adds documents: (document type, top_k, threshold, filters, query) -> results
+_rag_query_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+_rag_query_stats = {'hits': 0, 'misses': 0}
+
+def _room_context_key(session_id: str, room_context: Dict[str, Any]) -> str:
+    """Key a session's room context so repeated analyses of the same room share retrieved RAG context"""
+    digest = hashlib.sha1(session_id.encode())
+    digest.update(orjson.dumps(room_context, option=orjson.OPT_SORT_KEYS))
+    return digest.hexdigest()
+
 # Import the new multi-stage prompts
 from utils.prompts import (
     PHOTO_CLASSIFICATION_PROMPT,
@@ -38,6 +170,49 @@ from utils.prompts import (
     DEMO_SCOPE_SYNTHESIS_PROMPT
 )
 
+# Stages 2 and 3 asked in one vision call; before photos come first in the image list
+COMBINED_INVENTORY_FORENSICS_PROMPT = """
+You are given renovation photos of one room. Photos {before_range} show the room BEFORE demolition
+and photos {after_range} show it AFTER demolition. Perform both tasks below, each only on its photos.
+
+TASK A - Before-demo inventory (photos {before_range}):
+{before_prompt}
+
+TASK B - After-demo forensic analysis (photos {after_range}):
+{after_prompt}
+
+CRITICAL INSTRUCTION: Respond ONLY with one JSON object of the form
+{{"before_inventory": <TASK A JSON>, "after_forensics": <TASK B JSON>}}
+No explanatory text before or after it. Start your response with '{{' and end with '}}'.
+""".strip()
+
+CLASSIFICATION_JSON_INSTRUCTION = "\n\nCRITICAL: Respond ONLY with valid JSON. No explanatory text. Start with '{' and end with '}'."
+FORENSICS_JSON_INSTRUCTION = "\n\nCRITICAL INSTRUCTION: You MUST respond ONLY with the JSON structure shown above. Do not include any explanatory text, comments, or narrative before or after the JSON. Start your response with '{' and end with '}'. The response must be valid, parseable JSON."
+
+# Evidence of photos classified from Google Vision's dominant state; shared, so immutable
+GOOGLE_VISION_EVIDENCE = ("google_vision_analysis",)
+
+# Stage prompts only vary by a few request fields, so each variant is formatted once
+@functools.lru_cache(maxsize=64)
+def _classification_prompt(room_type: str, analysis_type: str, total_photos: int) -> str:
+    """Stage 1 system prompt for a room type, analysis type and photo count"""
+    room_context = f"Room type: {room_type}. "
+    if analysis_type == "before_after_comparison":
+        room_context += "This is a before/after comparison analysis - please carefully distinguish between renovation BEFORE and AFTER states."
+    prompt = PHOTO_CLASSIFICATION_PROMPT.format(image_context=room_context, total_photos=total_photos)
+    return prompt + CLASSIFICATION_JSON_INSTRUCTION
+
+@functools.lru_cache(maxsize=64)
+def _before_inventory_prompt(room_type: str) -> str:
+    """Stage 2 prompt for a room type"""
+    return BEFORE_DEMO_INVENTORY_PROMPT.format(room_context=f"Room type: {room_type}. ")
+
+@functools.lru_cache(maxsize=64)
+def _after_forensics_prompt(room_type: str, json_only: bool = False) -> str:
+    """Stage 3 prompt for a room type, optionally with the strict JSON-only instruction"""
+    prompt = AFTER_DEMO_ANALYSIS_PROMPT.format(room_context=f"Room type: {room_type}. ")
+    return prompt + FORENSICS_JSON_INSTRUCTION if json_only else prompt
+
 @router.post("/compare-before-after")
 async def compare_before_after_images(
     before_images: List[UploadFile] = File(...),
@@ -51,12 +226,12 @@ async def compare_before_after_images(
     Compare before and after images to identify demolished areas with RAG enhancement
     """
     try:
-        analysis_id = str(uuid.uuid4())
+        analysis_id = secrets.token_hex(16)
         logger.info(f"Starting before/after comparison analysis: {analysis_id}")
         
         # Parse room context
         try:
-            room_data = json.loads(room_context)
+            room_data = _parse_form_json(room_context, 'room_context')
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid room_context JSON")
         
@@ -87,7 +262,7 @@ async def compare_before_after_images(
         )
         
         # Store analysis result
-        await _store_comparison_analysis(
+        _store_in_background(_store_comparison_analysis(
             analysis_id=analysis_id,
             session_id=session_id,
             room_data=room_data,
@@ -96,7 +271,7 @@ async def compare_before_after_images(
             before_features=before_features,
             after_features=after_features,
             comparison_result=comparison_result
-        )
+        ), analysis_id)
         
         # Prepare response
         response_data = {
@@ -144,7 +319,7 @@ async def extract_image_features(
         
         # Parse context
         try:
-            context_data = json.loads(context)
+            context_data = _parse_form_json(context, 'context')
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid context JSON")
         
@@ -185,12 +360,12 @@ async def analyze_with_rag_enhancement(
     Perform demo analysis with RAG enhancement for single image analysis
     """
     try:
-        analysis_id = str(uuid.uuid4())
+        analysis_id = secrets.token_hex(16)
         logger.info(f"Starting RAG-enhanced analysis: {analysis_id}")
         
         # Parse room data
         try:
-            room_context = json.loads(room_data)
+            room_context = _parse_form_json(room_data, 'room_data')
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid room_data JSON")
         
@@ -213,18 +388,19 @@ async def analyze_with_rag_enhancement(
             prompt=prompt,
             context_data=context_data,
             document_type='demo-scope',
-            rag_enabled=rag_enabled
+            rag_enabled=rag_enabled,
+            ctx_key=_room_context_key(session_id, room_context)
         )
         
         # Store enhanced analysis
-        await _store_enhanced_analysis(
+        _store_in_background(_store_enhanced_analysis(
             analysis_id=analysis_id,
             session_id=session_id,
             room_context=room_context,
             images=image_data,
             result=result,
             analysis_type=analysis_type
-        )
+        ), analysis_id)
         
         # Prepare response
         response_data = {
@@ -272,23 +448,35 @@ async def query_rag_knowledge_base(
         
         # Parse filters
         try:
-            filter_dict = json.loads(filters)
+            filter_dict = _parse_form_json(filters, 'filters')
         except json.JSONDecodeError:
             filter_dict = {}
         
-        # Search RAG knowledge base
-        results = await rag_service.search_similar_documents(
-            query=query,
-            document_type=document_type,
-            top_k=top_k,
-            similarity_threshold=similarity_threshold,
-            filters=filter_dict
+        cache_key = (
+            document_type, top_k, similarity_threshold,
+            orjson.dumps(filter_dict, option=orjson.OPT_SORT_KEYS), query.strip()
         )
+        results = _rag_query_cache.get(cache_key)
+        if results is not None:
+            _rag_query_stats['hits'] += 1
+        else:
+            _rag_query_stats['misses'] += 1
+            
+            # Search RAG knowledge base
+            results = await rag_service.search_similar_documents(
+                query=query,
+                document_type=document_type,
+                top_k=top_k,
+                similarity_threshold=similarity_threshold,
+                filters=filter_dict
+            )
+            _rag_query_cache[cache_key] = results
         
         return JSONResponse(content={
             "success": True,
             "results": results,
-            "query_time_ms": 0  # Would be populated by rag_service
+            "query_time_ms": 0,  # Would be populated by rag_service
+            "cache_stats": dict(_rag_query_stats)
         })
         
     except HTTPException:
@@ -319,7 +507,7 @@ async def submit_rag_feedback(
         
         # Parse feedback data
         try:
-            feedback_dict = json.loads(feedback_data)
+            feedback_dict = _parse_form_json(feedback_data, 'feedback_data')
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid feedback_data JSON")
         
@@ -327,6 +515,8 @@ async def submit_rag_feedback(
         feedback_dict['feedback_type'] = feedback_type
         feedback_dict['analysis_type'] = 'demo'
         
+        await wait_for_analysis_store(analysis_id)
+        
         # Process feedback
         await rag_service.add_feedback(
             analysis_id=analysis_id,
@@ -334,9 +524,13 @@ async def submit_rag_feedback(
             create_new_documents=True
         )
         
+        # New documents can change any cached retrieval
+        _rag_query_cache.clear()
+        ai_service.rag_analysis.rag_context_cache.clear()
+        
         return JSONResponse(content={
             "success": True,
-            "feedback_id": str(uuid.uuid4()),
+            "feedback_id": secrets.token_hex(16),
             "rag_updated": True,
             "learning_applied": ["area_calculation_refinement", "material_classification_improvement"],
             "thank_you_message": "Thank you for your feedback! This helps improve our AI accuracy."
@@ -357,45 +551,168 @@ async def submit_rag_feedback(
 
 # Helper functions
 
-async def _process_uploaded_images(images: List[UploadFile], analysis_type: str) -> List[Dict[str, Any]]:
-    """Process uploaded images and return metadata"""
-    processed_images = []
+def _parse_form_json(value: str, field: str) -> Any:
+    """Parse a JSON form field, rejecting oversized payloads before parsing them"""
+    if len(value) > settings.max_form_json_length:
+        raise HTTPException(status_code=413, detail=f"{field} is too large")
+    return orjson.loads(value)
+
+# Reads the leading JSON value of a model answer that carries trailing text
+_JSON_DECODER = json.JSONDecoder()
+
+def _parse_ai_json(response: str) -> Any:
+    """Parse a model's JSON answer, dropping markdown code fences and any text after the first value
+    
+    Raises json.JSONDecodeError when no JSON value leads the response.
+    """
+    cleaned = response.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    cleaned = cleaned.strip()
     
-    for i, image in enumerate(images):
+    if cleaned.endswith(("}", "]")):
         try:
-            # Read image content
-            content = await image.read()
-            
-            # Validate image
-            try:
-                pil_image = Image.open(BytesIO(content))
-                width, height = pil_image.size
-                format_name = pil_image.format
-            except Exception:
-                raise HTTPException(status_code=400, detail=f"Invalid image file: {image.filename}")
-            
-            # Create image metadata
-            image_data = {
-                "filename": image.filename,
-                "content_type": image.content_type,
-                "size_bytes": len(content),
-                "width": width,
-                "height": height,
-                "format": format_name,
-                "base64_data": base64.b64encode(content).decode('utf-8'),
-                "analysis_type": analysis_type,
-                "index": i
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
+            pass
+    # Models sometimes append commentary after the object; keep the first value
+    return _JSON_DECODER.raw_decode(cleaned)[0]
+
+def _gathered(results: List[Any]) -> List[Any]:
+    """Re-raise the first exception, in upload order, from gather(..., return_exceptions=True)"""
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+def _upload_size(image: UploadFile) -> int:
+    """Size of an upload, from the parsed form or by seeking its spooled file"""
+    if image.size is not None:
+        return image.size
+    image.file.seek(0, os.SEEK_END)
+    size = image.file.tell()
+    image.file.seek(0)
+    return size
+
+def _check_upload_sizes(images: List[UploadFile]):
+    """Reject oversized images and batches with 413 before any of them is read or decoded"""
+    total = 0
+    for image in images:
+        size = _upload_size(image)
+        if size > settings.max_image_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image {image.filename} exceeds {settings.max_image_bytes} bytes"
+            )
+        total += size
+    if total > settings.max_batch_bytes:
+        raise HTTPException(status_code=413, detail=f"Images exceed {settings.max_batch_bytes} bytes in total")
+
+def _describe_image(file: BinaryIO, filename: str, content_type: str, index: int, analysis_type: str) -> Dict[str, Any]:
+    """Validate an uploaded image, store it and build its metadata; run in a worker thread
+    
+    Reads the upload's spooled file directly rather than a bytes copy of it. The
+    metadata points at the stored file instead of embedding it, since it is
+    persisted with the analysis rows and never sent to the model.
+    """
+    file.seek(0, os.SEEK_END)
+    size_bytes = file.tell()
+    file.seek(0)
+    
+    # Validate image; Image.open parses only the header, so reading size and
+    # format never decodes pixels (no load() call here)
+    try:
+        pil_image = Image.open(file)
+        width, height = pil_image.size
+        format_name = pil_image.format
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid image file: {filename}")
+    
+    uri = file_service.store_image(file, os.path.splitext(filename or "")[1])
+    
+    # Create image metadata
+    return {
+        "filename": filename,
+        "content_type": content_type,
+        "size_bytes": size_bytes,
+        "width": width,
+        "height": height,
+        "format": format_name,
+        "uri": uri,
+        "analysis_type": analysis_type,
+        "index": index
+    }
+
+async def _process_uploaded_image(image: UploadFile, index: int, analysis_type: str) -> Dict[str, Any]:
+    """Process one uploaded image from its spooled file"""
+    try:
+        return await asyncio.to_thread(
+            _describe_image, image.file, image.filename, image.content_type, index, analysis_type
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to process image {image.filename}: {e}")
+        raise HTTPException(status_code=400, detail=f"Failed to process image: {image.filename}")
+
+async def _process_uploaded_images(images: List[UploadFile], analysis_type: str) -> List[Dict[str, Any]]:
+    """Process uploaded images concurrently and return metadata"""
+    _check_upload_sizes(images)
+    return _gathered(await asyncio.gather(
+        *(_process_uploaded_image(image, i, analysis_type) for i, image in enumerate(images)),
+        return_exceptions=True
+    ))
+
+def _mock_image_features(analysis_type: str) -> Dict[str, Any]:
+    """Mock feature extraction for now - in production this would use actual vision AI"""
+    features = {
+        "materials": ["ceramic tile", "drywall", "wood trim"],
+        "surfaces": [
+            {
+                "type": "floor",
+                "area_sqft": 84.0,
+                "material": "ceramic tile",
+                "condition": "intact" if analysis_type == "before" else "removed"
+            },
+            {
+                "type": "wall",
+                "area_sqft": 320.0,
+                "material": "drywall",
+                "condition": "intact"
             }
-            
-            processed_images.append(image_data)
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Failed to process image {image.filename}: {e}")
-            raise HTTPException(status_code=400, detail=f"Failed to process image: {image.filename}")
+        ],
+        "architectural_elements": [
+            {
+                "type": "window",
+                "count": 1,
+                "condition": "present"
+            }
+        ],
+        "color_analysis": {
+            "dominant_colors": ["#f5f5dc", "#8b4513"],
+            "material_indicators": ["tile_grout", "wood_cabinet"]
+        },
+        "damage_assessment": {
+            "visible_damage": analysis_type == "after",
+            "demolition_evidence": ["removed_tiles", "exposed_subfloor"] if analysis_type == "after" else [],
+            "structural_changes": analysis_type == "after"
+        },
+        "processing_time_ms": 1200
+    }
     
-    return processed_images
+    return features
+
+# The mock features only differ for "before" and "after" (every other type matches "single"),
+# so they are built once per variant; nested values are shared and must be treated as read-only
+_MOCK_IMAGE_FEATURES = {
+    analysis_type: _mock_image_features(analysis_type)
+    for analysis_type in ("before", "after", "single")
+}
 
 async def _extract_image_features(
     image_data: List[Dict[str, Any]], 
@@ -404,43 +721,8 @@ async def _extract_image_features(
 ) -> Dict[str, Any]:
     """Extract features from images using AI vision"""
     try:
-        # Mock feature extraction for now - in production this would use actual vision AI
-        features = {
-            "materials": ["ceramic tile", "drywall", "wood trim"],
-            "surfaces": [
-                {
-                    "type": "floor",
-                    "area_sqft": 84.0,
-                    "material": "ceramic tile",
-                    "condition": "intact" if analysis_type == "before" else "removed"
-                },
-                {
-                    "type": "wall",
-                    "area_sqft": 320.0,
-                    "material": "drywall",
-                    "condition": "intact"
-                }
-            ],
-            "architectural_elements": [
-                {
-                    "type": "window",
-                    "count": 1,
-                    "condition": "present"
-                }
-            ],
-            "color_analysis": {
-                "dominant_colors": ["#f5f5dc", "#8b4513"],
-                "material_indicators": ["tile_grout", "wood_cabinet"]
-            },
-            "damage_assessment": {
-                "visible_damage": analysis_type == "after",
-                "demolition_evidence": ["removed_tiles", "exposed_subfloor"] if analysis_type == "after" else [],
-                "structural_changes": analysis_type == "after"
-            },
-            "processing_time_ms": 1200
-        }
-        
-        return features
+        features = _MOCK_IMAGE_FEATURES.get(analysis_type, _MOCK_IMAGE_FEATURES["single"])
+        return dict(features)
         
     except Exception as e:
         logger.error(f"Feature extraction failed: {e}")
@@ -458,7 +740,7 @@ async def _store_comparison_analysis(
 ):
     """Store before/after comparison analysis in database"""
     try:
-        execute_insert(
+        await async_execute_insert(
             """INSERT INTO demo_comparison_analysis 
                (analysis_id, session_id, room_id, before_images, after_images, 
                 before_features, after_features, demolished_areas, comparison_confidence,
@@ -469,19 +751,19 @@ async def _store_comparison_analysis(
                 analysis_id,
                 session_id,
                 room_data.get('room_id', 'unknown'),
-                json.dumps(before_images),
-                json.dumps(after_images),
-                json.dumps(before_features),
-                json.dumps(after_features),
-                json.dumps(comparison_result.get('demolished_areas', [])),
+                _dumps(before_images),
+                _dumps(after_images),
+                _dumps(before_features),
+                _dumps(after_features),
+                _dumps(comparison_result.get('demolished_areas', [])),
                 comparison_result.get('confidence_score', 0.0),
                 comparison_result.get('total_demolished_sqft', 0.0),
                 comparison_result.get('rag_enhanced', False),
-                json.dumps(comparison_result.get('rag_context', [])),
-                json.dumps(comparison_result.get('rag_insights', {})),
+                _dumps(comparison_result.get('rag_context', [])),
+                _dumps(comparison_result.get('rag_insights', {})),
                 comparison_result.get('model_version', 'unknown'),
                 comparison_result.get('processing_time_ms', 0),
-                datetime.utcnow().isoformat()
+                datetime.now(timezone.utc).isoformat(timespec="seconds")
             )
         )
         logger.info(f"Stored comparison analysis: {analysis_id}")
@@ -499,7 +781,7 @@ async def _store_enhanced_analysis(
 ):
     """Store RAG-enhanced analysis in database"""
     try:
-        execute_insert(
+        await async_execute_insert(
             """INSERT INTO demo_ai_analysis_enhanced 
                (analysis_id, session_id, room_id, analysis_type, images,
                 rag_enabled, rag_context, rag_applied_insights, 
@@ -510,13 +792,13 @@ async def _store_enhanced_analysis(
                 session_id,
                 room_context.get('room_id', 'unknown'),
                 analysis_type,
-                json.dumps(images),
+                _dumps(images),
                 result.get('rag_enhanced', False),
-                json.dumps(result.get('rag_context', [])),
-                json.dumps(result.get('rag_insights', {})),
-                json.dumps(result),
+                _dumps(result.get('rag_context', [])),
+                _dumps(result.get('rag_insights', {})),
+                _dumps(result),
                 result.get('confidence_score', 0.0),
-                datetime.utcnow().isoformat()
+                datetime.now(timezone.utc).isoformat(timespec="seconds")
             )
         )
         logger.info(f"Stored enhanced analysis: {analysis_id}")
@@ -524,18 +806,16 @@ async def _store_enhanced_analysis(
     except Exception as e:
         logger.error(f"Failed to store enhanced analysis: {e}")
 
-def _build_enhanced_analysis_prompt(image_data: List[Dict], room_context: Dict[str, Any]) -> str:
-    """Build enhanced analysis prompt for single image analysis"""
-    
-    prompt = f"""
+# Prompt for single image analysis, trimmed once at import; JSON braces are doubled for str.format
+ENHANCED_ANALYSIS_PROMPT = """
 Analyze the uploaded room images for demolition areas.
 
 Room Context:
-- Type: {room_context.get('room_type', 'Unknown')}
-- Known Materials: {room_context.get('known_materials', [])}
-- Dimensions: {room_context.get('dimensions', {})}
+- Type: {room_type}
+- Known Materials: {known_materials}
+- Dimensions: {dimensions}
 
-Images: {len(image_data)} uploaded
+Images: {image_count} uploaded
 
 Task:
 1. Identify all demolished or damaged areas
@@ -559,8 +839,132 @@ Output format (JSON):
   "total_demolished_sqft": 0.0,
   "confidence_score": 0.0
 }}
-"""
-    return prompt.strip()
+""".strip()
+
+def _build_enhanced_analysis_prompt(image_data: List[Dict], room_context: Dict[str, Any]) -> str:
+    """Build enhanced analysis prompt for single image analysis"""
+    return ENHANCED_ANALYSIS_PROMPT.format(
+        room_type=room_context.get('room_type', 'Unknown'),
+        known_materials=room_context.get('known_materials', []),
+        dimensions=room_context.get('dimensions', {}),
+        image_count=len(image_data)
+    )
+
+# Photo classification only needs to tell before from after, so it sees smaller images
+CLASSIFICATION_MAX_DIMENSION = 1024
+
+def _store_jpeg(image: Image.Image, quality: int) -> Tuple[str, int]:
+    """Encode an image as JPEG into the image store; returns (path, JPEG size)"""
+    # Store straight from the buffer's memory instead of a getvalue() copy
+    img_byte_arr = BytesIO()
+    image.save(img_byte_arr, format='JPEG', quality=quality)
+    with img_byte_arr.getbuffer() as jpeg:
+        return file_service.store_image_bytes(jpeg, '.jpg'), jpeg.nbytes
+
+def _resize_and_store(content: bytes, max_dimension: int = 2048, quality: int = 85) -> Tuple[str, str, int, int, int]:
+    """Downscale an image and store it as a JPEG for the vision model
+    
+    Runs in a worker process: PIL holds the GIL while resampling, so threads would
+    serialize concurrent uploads. The JPEG is written to the content-addressed image
+    store rather than returned, so the analysis keeps only its path in memory; a
+    second, classification-sized JPEG is stored when the image is larger than that.
+    Returns (JPEG path, classification JPEG path, JPEG size, width, height).
+    """
+    image = Image.open(BytesIO(content))
+    
+    # Resize if too large
+    width, height = image.size
+    if width > max_dimension or height > max_dimension:
+        if width > height:
+            new_width = max_dimension
+            new_height = int((height / width) * max_dimension)
+        else:
+            new_width = int((width / height) * max_dimension)
+            new_height = max_dimension
+        # For JPEGs, have libjpeg decode at 1/2, 1/4 or 1/8 scale while still covering
+        # the target size, so LANCZOS starts from a smaller image (no-op for other formats)
+        image.draft('RGB', (new_width, new_height))
+        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    
+    # Convert to RGB if needed
+    if image.mode in ('RGBA', 'LA', 'P'):
+        rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        rgb_image.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        image = rgb_image
+    
+    path, size = _store_jpeg(image, quality)
+    
+    classification_path = path
+    if max(image.size) > CLASSIFICATION_MAX_DIMENSION:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((CLASSIFICATION_MAX_DIMENSION, CLASSIFICATION_MAX_DIMENSION), Image.Resampling.BILINEAR)
+        classification_path, _ = _store_jpeg(thumbnail, quality)
+    
+    return path, classification_path, size, image.width, image.height
+
+async def _prepare_analysis_image(image_file: UploadFile, index: int) -> Dict[str, Any]:
+    """Resize and store one uploaded image for the vision model in the image process pool"""
+    content = await image_file.read()
+    path, classification_path, size, width, height = await asyncio.get_running_loop().run_in_executor(
+        _get_image_pool(), _resize_and_store, content
+    )
+    
+    return {
+        "id": f"photo_{index+1}",
+        "filename": image_file.filename,
+        "size": size,
+        "dimensions": {"width": width, "height": height},
+        "path": path,
+        "classification_path": classification_path
+    }
+
+def _unique_images(images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop repeated uploads of the same photo; stored paths are content-addressed"""
+    seen = set()
+    unique = []
+    for img in images:
+        if img["path"] not in seen:
+            seen.add(img["path"])
+            unique.append(img)
+    return unique
+
+def _fan_out_classifications(classification: Dict, unique_images: List[Dict[str, Any]],
+                             images: List[Dict[str, Any]]) -> Dict:
+    """Give every uploaded photo the classification of its unique copy
+    
+    The model numbers the unique photos it was shown photo_1..photo_N, in order.
+    """
+    by_id = {entry.get("photo_id"): entry for entry in classification.get("photo_classifications", [])}
+    by_path = {}
+    for position, img in enumerate(unique_images):
+        entry = by_id.get(f"photo_{position+1}")
+        if entry is not None:
+            by_path[img["path"]] = entry
+    
+    photo_classifications = [
+        {**by_path[img["path"]], "photo_id": img["id"]}
+        for img in images if img["path"] in by_path
+    ]
+    return {**classification, "photo_classifications": photo_classifications}
+
+def _analyze_stored_images(images: List[Dict[str, Any]], prompt: str, path_key: str = "path") -> str:
+    """Base64-encode stored analysis images just for one vision call; run in a worker thread"""
+    base64_images = [
+        base64.b64encode(file_service.read_file(img[path_key])).decode('ascii')
+        for img in images
+    ]
+    return ai_service.analyze_multiple_images(base64_images, prompt)
+
+# Vision and synthesis calls in flight across all requests; concurrent stages and sessions
+# otherwise fan out past the provider's rate limits
+_ai_semaphore = asyncio.Semaphore(settings.ai_max_inflight)
+
+async def _analyze_images_limited(images: List[Dict[str, Any]], prompt: str, path_key: str = "path") -> str:
+    """Run _analyze_stored_images in a worker thread once an AI call slot is free"""
+    async with _ai_semaphore:
+        return await asyncio.to_thread(_analyze_stored_images, images, prompt, path_key)
 
 @router.post("/analyze-multi-stage")
 async def analyze_multi_stage_demolition(
@@ -569,7 +973,8 @@ async def analyze_multi_stage_demolition(
     session_id: str = Form(...),
     enable_rag: bool = Form(True),
     confidence_threshold: float = Form(0.7),
-    analysis_type: str = Form("demo_calculation")
+    analysis_type: str = Form("demo_calculation"),
+    defer_synthesis: bool = Form(False)
 ):
     """
     Multi-stage demolition analysis using the new 4-stage workflow:
@@ -577,63 +982,39 @@ async def analyze_multi_stage_demolition(
     2. Before-Demo Inventory (if applicable)
     3. After-Demo Forensic Analysis (if applicable) 
     4. Demo Scope Synthesis
+    
+    With defer_synthesis, responds 202 after stage 3 and runs stage 4 in the background;
+    the full result is then polled from GET /multi-stage/{analysis_id}/synthesis.
     """
     try:
-        analysis_id = str(uuid.uuid4())
+        analysis_id = secrets.token_hex(16)
         logger.info(f"Starting multi-stage analysis: {analysis_id}")
         
         # Parse room context
         try:
-            room_data = json.loads(room_context)
+            room_data = _parse_form_json(room_context, 'room_context')
         except json.JSONDecodeError:
             room_data = {"room_type": "unknown"}
         
         # Process and encode images
-        processed_images = []
-        for i, image_file in enumerate(images):
+        for image_file in images:
             if not image_file.content_type.startswith('image/'):
                 raise HTTPException(status_code=400, detail=f"File {image_file.filename} is not an image")
-            
-            image_data = await image_file.read()
-            image = Image.open(BytesIO(image_data))
-            
-            # Resize if too large
-            max_dimension = 2048
-            width, height = image.size
-            if width > max_dimension or height > max_dimension:
-                if width > height:
-                    new_width = max_dimension
-                    new_height = int((height / width) * max_dimension)
-                else:
-                    new_width = int((width / height) * max_dimension)
-                    new_height = max_dimension
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Convert to RGB if needed
-            if image.mode in ('RGBA', 'LA', 'P'):
-                rgb_image = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                rgb_image.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-                image = rgb_image
-            
-            # Save to bytes and encode
-            img_byte_arr = BytesIO()
-            image.save(img_byte_arr, format='JPEG', quality=85)
-            img_byte_arr = img_byte_arr.getvalue()
-            base64_image = base64.b64encode(img_byte_arr).decode('utf-8')
-            
-            processed_images.append({
-                "id": f"photo_{i+1}",
-                "filename": image_file.filename,
-                "size": len(img_byte_arr),
-                "dimensions": {"width": image.width, "height": image.height},
-                "base64_data": base64_image
-            })
+        _check_upload_sizes(images)
+        
+        processed_images = _gathered(await asyncio.gather(
+            *(_prepare_analysis_image(image_file, i) for i, image_file in enumerate(images)),
+            return_exceptions=True
+        ))
         
         # Stage 1: Photo Classification
         logger.info(f"Stage 1: Photo Classification for {analysis_id} (analysis_type: {analysis_type})")
-        classification_result = await _classify_photos(processed_images, room_data, analysis_type)
+        unique_images = _unique_images(processed_images)
+        if len(unique_images) < len(processed_images):
+            logger.info(f"📸 Classifying {len(unique_images)} unique of {len(processed_images)} uploaded photos")
+        classification_result = await _classify_photos(unique_images, str(room_data.get('room_type', 'unknown')), analysis_type)
+        if len(unique_images) < len(processed_images):
+            classification_result = _fan_out_classifications(classification_result, unique_images, processed_images)
         logger.info(f"✅ Classification result summary: {len(classification_result.get('photo_classifications', []))} photos classified")
         
         # Determine workflow based on user's analysis type and classification
@@ -644,8 +1025,9 @@ async def analyze_multi_stage_demolition(
             # Use AI's recommendation for other cases
             workflow = classification_result.get("overall_assessment", {}).get("recommended_workflow", "single_stage_forensic")
         
-        stage2_result = None
-        stage3_result = None
+        # Stages 2 and 3 look at disjoint photo sets, so they run together (see _run_inventory_and_forensics)
+        stage2_images = None
+        stage3_images = None
         
         # Stage 2: Before-Demo Inventory
         before_photos = [p for p in classification_result.get("photo_classifications", []) 
@@ -656,10 +1038,8 @@ async def analyze_multi_stage_demolition(
         if workflow in ["before_after_comparison", "multi_stage_enhanced"]:
             if before_photos:
                 logger.info(f"Stage 2: Before-Demo Inventory for {analysis_id} - analyzing {len(before_photos)} before photos")
-                stage2_result = await _analyze_before_demo_inventory(
-                    [img for img in processed_images if f"photo_{processed_images.index(img)+1}" in [p["photo_id"] for p in before_photos]], 
-                    room_data
-                )
+                before_ids = {p["photo_id"] for p in before_photos}
+                stage2_images = _unique_images([img for img in processed_images if img["id"] in before_ids])
             elif analysis_type == "before_after_comparison":
                 # User selected before/after but AI didn't detect before photos
                 # Try to analyze some photos as before anyway
@@ -668,10 +1048,7 @@ async def analyze_multi_stage_demolition(
                 total_images = len(processed_images)
                 half_point = max(1, total_images // 2)  # At least 1 image
                 logger.info(f"📸 Total images: {total_images}, analyzing first {half_point} as 'before' photos")
-                stage2_result = await _analyze_before_demo_inventory(
-                    processed_images[:half_point], 
-                    room_data
-                )
+                stage2_images = _unique_images(processed_images[:half_point])
         
         # Stage 3: After-Demo Forensic Analysis
         after_photos = [p for p in classification_result.get("photo_classifications", []) 
@@ -680,74 +1057,43 @@ async def analyze_multi_stage_demolition(
             logger.info(f"Stage 3: After-Demo Forensic Analysis for {analysis_id}")
             forensic_images = processed_images
             if after_photos:
-                forensic_images = [img for img in processed_images if f"photo_{processed_images.index(img)+1}" in [p["photo_id"] for p in after_photos]]
-            stage3_result = await _analyze_after_demo_forensics(forensic_images, room_data)
-        
-        # Stage 4: Demo Scope Synthesis
-        logger.info(f"Stage 4: Demo Scope Synthesis for {analysis_id}")
-        final_result = await _synthesize_demo_scope(
-            before_inventory=stage2_result,
-            after_analysis=stage3_result,
-            room_context=room_data,
-            classification=classification_result
+                after_ids = {p["photo_id"] for p in after_photos}
+                forensic_images = [img for img in processed_images if img["id"] in after_ids]
+            stage3_images = _unique_images(forensic_images)
+        
+        stage2_result, stage3_result = await _run_inventory_and_forensics(
+            stage2_images, stage3_images, room_data,
+            # Only classified before/after sets are disjoint enough to share one call
+            combine=bool(before_photos and after_photos)
         )
         
-        # Store complete analysis
-        await _store_multi_stage_analysis(
-            analysis_id=analysis_id,
-            session_id=session_id,
-            room_context=room_data,
-            images=processed_images,
-            classification_result=classification_result,
-            stage2_result=stage2_result,
-            stage3_result=stage3_result,
-            final_result=final_result
-        )
-        
-        # Get demolished areas from synthesis result (Stage 4) which combines all analyses
-        demolished_areas = []
-        if final_result and "final_demolition_scope" in final_result:
-            # Convert final_demolition_scope to demolished_areas format
-            for elem in final_result.get("final_demolition_scope", []):
-                demolished_areas.append({
-                    "surface_type": elem.get("element_type", elem.get("surface_type", "unknown")),
-                    "material_removed": elem.get("material_removed", "unknown"),
-                    "description": elem.get("scope_description", elem.get("description", "")),
-                    "estimated_area_sqft": elem.get("final_area_sqft", elem.get("estimated_area_sqft", 0)),
-                    "demolition_completeness": elem.get("demolition_completeness", "total"),
-                    "completion_percentage": elem.get("completion_percentage", 100),
-                    "confidence": elem.get("confidence", elem.get("confidence_breakdown", {}).get("final_confidence", 0.8))
-                })
-        elif stage3_result and "detected_removed_elements" in stage3_result:
-            # Fallback to Stage 3 results if synthesis failed
-            logger.warning("Using Stage 3 results as fallback - synthesis may have failed")
-            for elem in stage3_result.get("detected_removed_elements", []):
-                demolished_areas.append({
-                    "surface_type": elem.get("element_type", "unknown"),
-                    "material_removed": elem.get("original_material", "unknown"),
-                    "description": elem.get("evidence_description", ""),
-                    "estimated_area_sqft": elem.get("area_affected", 0),
-                    "demolition_completeness": elem.get("removal_completeness", "complete"),
-                    "completion_percentage": 100 if elem.get("removal_completeness") == "complete" else 50,
-                    "confidence": elem.get("confidence_level", 0.8)
-                })
-        
-        # Prepare response in compatible format
-        response_data = {
-            "success": True,
-            "analysis_id": analysis_id,
-            "workflow_used": workflow,
-            "demolished_areas": demolished_areas,
-            "classification_summary": classification_result.get("overall_assessment", {}),
-            "synthesis_summary": final_result.get("synthesis_summary", {}) if final_result else {},
-            "validation_results": final_result.get("validation_results", {}) if final_result else {},
-            "estimation_data": final_result.get("estimation_data", {}) if final_result else {},
-            "confidence_score": final_result.get("synthesis_summary", {}).get("overall_confidence", 0.8) if final_result else 0.8,
-            "model_version": settings.openai_vision_model,
-            "processing_time_ms": 0  # Could be calculated if needed
-        }
+        # A failed stage is left out of the synthesis instead of failing the whole analysis
+        if isinstance(stage2_result, Exception):
+            logger.error(f"Stage 2 failed for {analysis_id}, synthesizing without it: {stage2_result}")
+            stage2_result = None
+        if isinstance(stage3_result, Exception):
+            logger.error(f"Stage 3 failed for {analysis_id}, synthesizing without it: {stage3_result}")
+            stage3_result = None
+        
+        if defer_synthesis:
+            _synthesis_tasks[analysis_id] = _store_in_background(_deferred_multi_stage_analysis(
+                analysis_id, session_id, room_data, processed_images, workflow,
+                classification_result, stage2_result, stage3_result
+            ))
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "analysis_id": analysis_id,
+                "workflow_used": workflow,
+                "classification_summary": classification_result.get("overall_assessment", {}),
+                "before_inventory": stage2_result,
+                "after_analysis": stage3_result,
+                "synthesis_url": f"{router.prefix}/multi-stage/{analysis_id}/synthesis"
+            })
         
-        logger.info(f"Multi-stage analysis completed: {analysis_id}")
+        response_data = await _complete_multi_stage_analysis(
+            analysis_id, session_id, room_data, processed_images, workflow,
+            classification_result, stage2_result, stage3_result
+        )
         return JSONResponse(content=response_data)
         
     except HTTPException:
@@ -757,140 +1103,282 @@ async def analyze_multi_stage_demolition(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Multi-stage analysis failed: {str(e)}")
 
-async def _classify_photos(images: List[Dict], room_data: Dict, analysis_type: str = "demo_calculation") -> Dict:
-    """Stage 1: Classify photos as before/after demo"""
+async def _complete_multi_stage_analysis(analysis_id: str, session_id: str, room_data: Dict, processed_images: List[Dict],
+                                         workflow: str, classification_result: Dict, stage2_result: Optional[Dict],
+                                         stage3_result: Optional[Dict]) -> Dict:
+    """Run stage 4, store the analysis and build the multi-stage response data"""
+    # Stage 4: Demo Scope Synthesis
+    logger.info(f"Stage 4: Demo Scope Synthesis for {analysis_id}")
+    final_result = await _synthesize_demo_scope(
+        before_inventory=stage2_result,
+        after_analysis=stage3_result,
+        room_context=room_data,
+        classification=classification_result
+    )
+    
+    # Store complete analysis
+    _store_in_background(_store_multi_stage_analysis(
+        analysis_id=analysis_id,
+        session_id=session_id,
+        room_context=room_data,
+        images=processed_images,
+        classification_result=classification_result,
+        stage2_result=stage2_result,
+        stage3_result=stage3_result,
+        final_result=final_result
+    ), analysis_id)
+    
+    # Get demolished areas from synthesis result (Stage 4) which combines all analyses
+    demolished_areas = []
+    if final_result and "final_demolition_scope" in final_result:
+        # Convert final_demolition_scope to demolished_areas format
+        for elem in final_result.get("final_demolition_scope", []):
+            demolished_areas.append({
+                "surface_type": elem.get("element_type", elem.get("surface_type", "unknown")),
+                "material_removed": elem.get("material_removed", "unknown"),
+                "description": elem.get("scope_description", elem.get("description", "")),
+                "estimated_area_sqft": elem.get("final_area_sqft", elem.get("estimated_area_sqft", 0)),
+                "demolition_completeness": elem.get("demolition_completeness", "total"),
+                "completion_percentage": elem.get("completion_percentage", 100),
+                "confidence": elem.get("confidence", elem.get("confidence_breakdown", {}).get("final_confidence", 0.8))
+            })
+    elif stage3_result and "detected_removed_elements" in stage3_result:
+        # Fallback to Stage 3 results if synthesis failed
+        logger.warning("Using Stage 3 results as fallback - synthesis may have failed")
+        for elem in stage3_result.get("detected_removed_elements", []):
+            demolished_areas.append({
+                "surface_type": elem.get("element_type", "unknown"),
+                "material_removed": elem.get("original_material", "unknown"),
+                "description": elem.get("evidence_description", ""),
+                "estimated_area_sqft": elem.get("area_affected", 0),
+                "demolition_completeness": elem.get("removal_completeness", "complete"),
+                "completion_percentage": 100 if elem.get("removal_completeness") == "complete" else 50,
+                "confidence": elem.get("confidence_level", 0.8)
+            })
+    
+    # Prepare response in compatible format
+    response_data = {
+        "success": True,
+        "analysis_id": analysis_id,
+        "workflow_used": workflow,
+        "demolished_areas": demolished_areas,
+        "classification_summary": classification_result.get("overall_assessment", {}),
+        "synthesis_summary": final_result.get("synthesis_summary", {}) if final_result else {},
+        "validation_results": final_result.get("validation_results", {}) if final_result else {},
+        "estimation_data": final_result.get("estimation_data", {}) if final_result else {},
+        "confidence_score": final_result.get("synthesis_summary", {}).get("overall_confidence", 0.8) if final_result else 0.8,
+        "model_version": settings.openai_vision_model,
+        "processing_time_ms": 0  # Could be calculated if needed
+    }
+    
+    logger.info(f"Multi-stage analysis completed: {analysis_id}")
+    return response_data
+
+async def _deferred_multi_stage_analysis(analysis_id: str, *args: Any) -> Dict:
+    """Background stage 4 for defer_synthesis; a failure becomes the polled result"""
     try:
-        # Prepare context
-        room_context = f"Room type: {room_data.get('room_type', 'unknown')}. "
-        
-        # Format prompt based on analysis type
-        if analysis_type == "before_after_comparison":
-            enhanced_context = f"{room_context}This is a before/after comparison analysis - please carefully distinguish between renovation BEFORE and AFTER states."
-        else:
-            enhanced_context = room_context
-            
-        # Include total_photos in the prompt
-        prompt = PHOTO_CLASSIFICATION_PROMPT.format(
-            image_context=enhanced_context,
-            total_photos=len(images)
+        return await _complete_multi_stage_analysis(analysis_id, *args)
+    except Exception as e:
+        logger.error(f"Deferred synthesis failed for {analysis_id}: {e}")
+        return {"success": False, "error": "Multi-stage analysis failed", "details": str(e)}
+
+@router.get("/multi-stage/{analysis_id}/synthesis")
+async def get_multi_stage_synthesis(analysis_id: str):
+    """Poll a deferred multi-stage synthesis; 202 with Retry-After while it is still running"""
+    task = _synthesis_tasks.get(analysis_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Synthesis not found or expired")
+    if not task.done():
+        return JSONResponse(
+            status_code=202,
+            content={"success": True, "analysis_id": analysis_id, "status": "running"},
+            headers={"Retry-After": "2"}
         )
-        
-        # Prepare messages for AI
-        messages = [{"role": "system", "content": prompt}]
-        
-        # Add images
-        image_contents = []
-        for img in images:
-            image_contents.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{img['base64_data']}",
-                    "detail": "high"
-                }
+    
+    result = task.result()
+    return JSONResponse(status_code=200 if result["success"] else 500, content=result)
+
+async def _skipped_stage_result(reason: str) -> Dict:
+    """Result of an analysis stage that had no photos to look at; synthesis sees the flag instead of guessing"""
+    logger.info(f"Skipping analysis stage: {reason}")
+    return {"skipped": True, "reason": reason}
+
+async def _run_inventory_and_forensics(before_images: Optional[List[Dict]], after_images: Optional[List[Dict]],
+                                       room_data: Dict, combine: bool) -> List[Any]:
+    """Run stages 2 and 3 and return their results, or the exception each one raised
+    
+    When both stages run on classified photos they are first tried as one combined
+    vision call; the separate calls are the fallback if that answer does not validate.
+    """
+    if combine and before_images and after_images:
+        try:
+            combined = await _analyze_before_and_after_combined(before_images, after_images, room_data)
+            if combined is not None:
+                return [combined["before_inventory"], combined["after_forensics"]]
+            logger.warning("Combined before/after analysis did not validate, running the stages separately")
+        except Exception as e:
+            logger.warning(f"Combined before/after analysis failed, running the stages separately: {e}")
+    
+    return await asyncio.gather(
+        _analyze_before_demo_inventory(before_images, room_data) if before_images else _skipped_stage_result("no before-demo photos"),
+        _analyze_after_demo_forensics(after_images, room_data) if after_images else _skipped_stage_result("no after-demo photos"),
+        return_exceptions=True
+    )
+
+@_cached_stage("before_after_combined")
+async def _analyze_before_and_after_combined(before_images: List[Dict], after_images: List[Dict],
+                                            room_data: Dict) -> Optional[Dict]:
+    """Stages 2 and 3 in one vision call; returns None when the answer lacks either section"""
+    room_type = str(room_data.get('room_type', 'unknown'))
+    before_count = len(before_images)
+    total = before_count + len(after_images)
+    
+    prompt = COMBINED_INVENTORY_FORENSICS_PROMPT.format(
+        before_range=f"1-{before_count}",
+        after_range=f"{before_count + 1}-{total}",
+        before_prompt=_before_inventory_prompt(room_type),
+        after_prompt=_after_forensics_prompt(room_type)
+    )
+    
+    logger.info(f"🔍 Stages 2+3: Analyzing {before_count} before and {len(after_images)} after images in one call")
+    response = await _analyze_images_limited(before_images + after_images, prompt)
+    if not response or not response.strip() or ai_service.is_mock_image_analysis(response):
+        return None
+    
+    try:
+        result = _parse_ai_json(response)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Combined before/after JSON parsing error: {e}")
+        return None
+    
+    if (not isinstance(result, dict)
+            or not isinstance(result.get("before_inventory"), dict)
+            or not isinstance(result.get("after_forensics"), dict)
+            or "forensic_analysis" not in result["after_forensics"]):
+        return None
+    return result
+
+def _google_classification_to_canonical(result: Dict, image_count: int) -> Dict:
+    """Convert a Google Vision classification_analysis answer to the photo_classifications schema"""
+    classification_data = result.get("classification_analysis", {})
+    total_photos = classification_data.get("total_photos", image_count)
+    dominant_state = classification_data.get("dominant_state", "after")
+    
+    # Check if there are individual photo classifications
+    individual_classifications = classification_data.get("individual_classifications", [])
+    
+    if individual_classifications:
+        # Use individual classifications if available
+        photo_classifications = []
+        for i, img_class in enumerate(individual_classifications):
+            photo_classifications.append({
+                "photo_id": f"photo_{i+1}",
+                "classification": img_class.get("state", "after") + "_demo",
+                "confidence": img_class.get("confidence", 0.5),
+                "primary_evidence": img_class.get("evidence", ["google_vision_analysis"]),
+                "supporting_details": img_class.get("details", ""),
+                "next_analysis_recommendation": "forensic"
             })
-        
-        messages.append({
-            "role": "user", 
-            "content": [
-                {"type": "text", "text": "Classify these renovation photos as before-demo or after-demo states."},
-                *image_contents
-            ]
+    else:
+        # Fallback to dominant state for all images; only the photo id differs per entry
+        classification = dominant_state + "_demo" if dominant_state in ["before", "after"] else "after_demo"
+        confidence = classification_data.get("analysis_confidence", 0.5)
+        reasoning = classification_data.get("classification_reasoning", "")
+        photo_classifications = [{
+            "photo_id": f"photo_{i+1}",
+            "classification": classification,
+            "confidence": confidence,
+            "primary_evidence": GOOGLE_VISION_EVIDENCE,
+            "supporting_details": reasoning,
+            "next_analysis_recommendation": "forensic"
+        } for i in range(total_photos)]
+    
+    return {
+        "photo_classifications": photo_classifications,
+        "overall_assessment": {
+            "dominant_state": f"primarily_{dominant_state}" if dominant_state in ["before", "after"] else "primarily_after",
+            "confidence_level": classification_data.get("analysis_confidence", 0.5),
+            "recommended_workflow": classification_data.get("recommended_workflow", "single_stage_forensic")
+        }
+    }
+
+def _google_forensics_to_canonical(result: Dict) -> Dict:
+    """Convert a Google Vision demolition_analysis answer to the forensic_analysis schema"""
+    demolished_elements = result.get("demolished_elements", [])
+    detected_removed_elements = []
+    
+    for elem in demolished_elements:
+        detected_removed_elements.append({
+            "element_type": elem.get("original_element_type", "unknown"),
+            "original_material": elem.get("inferred_material", "unknown"),
+            "removal_evidence": [elem.get("removal_evidence", "evidence")],
+            "confidence_level": elem.get("inference_confidence", 0.5),
+            "detection_method": "google_vision_detection",
+            "original_dimensions": elem.get("estimated_dimensions", {}),
+            "original_location": elem.get("location", "unknown"),
+            "area_affected": elem.get("estimated_area", 0),
+            "removal_completeness": "complete",
+            "replacement_indication": "likely_planned"
         })
-        
+    
+    demolition_analysis = result.get("demolition_analysis", {})
+    return {
+        "forensic_analysis": {
+            "demolition_type": demolition_analysis.get("demolition_scope", "selective"),
+            "demolition_quality": demolition_analysis.get("work_quality", "professional"),
+            "work_sequence": demolition_analysis.get("completion_status", "in_progress"),
+            "safety_evidence": "adequate"
+        },
+        "detected_removed_elements": detected_removed_elements,
+        "inference_summary": {
+            "total_elements_removed": len(detected_removed_elements),
+            "renovation_scope": demolition_analysis.get("room_current_state", "partial"),
+            "primary_removal_methods": ["professional_demolition"],
+            "estimated_completion": 50
+        }
+    }
+
+@_cached_stage("classification")
+async def _classify_photos(images: List[Dict], room_type: str, analysis_type: str = "demo_calculation") -> Dict:
+    """Stage 1: Classify photos as before/after demo
+    
+    Takes only the room type from the room data, so the cached result survives edits to the
+    rest of the room metadata.
+    """
+    try:
         # Extract prompt text and analyze all images
         if images:
-            # Add explicit JSON instruction
-            json_instruction = "\n\nCRITICAL: Respond ONLY with valid JSON. No explanatory text. Start with '{' and end with '}'."
-            system_prompt = f"{prompt}{json_instruction}"
-            
-            # Extract all base64 images
-            base64_images = [img['base64_data'] for img in images]
-            response = ai_service.analyze_multiple_images(base64_images, system_prompt)
+            system_prompt = _classification_prompt(room_type, analysis_type, len(images))
+            response = await _analyze_images_limited(images, system_prompt, "classification_path")
             
             # Log for debugging
             logger.info(f"🔍 Photo classification raw AI response (first 200 chars): '{response[:200] if response else 'None'}'")
             
+            degraded = ai_service.is_mock_image_analysis(response)
+            
             # Check for empty response
             if not response or response.strip() == "":
                 response = '{"photo_classifications": [], "overall_assessment": {"dominant_state": "unclear", "confidence_level": 0, "recommended_workflow": "single_stage_forensic"}}'
+                degraded = True
         else:
             response = '{"photo_classifications": [], "overall_assessment": {"dominant_state": "unclear", "confidence_level": 0, "recommended_workflow": "single_stage_forensic"}}'
+            degraded = True
         
         # Parse response
         try:
-            # Clean response
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            elif cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
+            result = _parse_ai_json(response)
             
-            try:
-                result = json.loads(cleaned_response.strip())
+            # Google Vision is tried before the configured provider and answers in its own schema
+            if "classification_analysis" in result and "photo_classifications" not in result:
+                result = _google_classification_to_canonical(result, len(images))
                 
-                # Handle different response formats from different AI providers
-                # Google Vision API might return different keys
-                if "classification_analysis" in result and "photo_classifications" not in result:
-                    # Convert Google Vision format to expected format
-                    classification_data = result.get("classification_analysis", {})
-                    total_photos = classification_data.get("total_photos", len(images))
-                    dominant_state = classification_data.get("dominant_state", "after")
-                    
-                    # Check if there are individual photo classifications
-                    individual_classifications = classification_data.get("individual_classifications", [])
-                    
-                    if individual_classifications:
-                        # Use individual classifications if available
-                        photo_classifications = []
-                        for i, img_class in enumerate(individual_classifications):
-                            photo_classifications.append({
-                                "photo_id": f"photo_{i+1}",
-                                "classification": img_class.get("state", "after") + "_demo",
-                                "confidence": img_class.get("confidence", 0.5),
-                                "primary_evidence": img_class.get("evidence", ["google_vision_analysis"]),
-                                "supporting_details": img_class.get("details", ""),
-                                "next_analysis_recommendation": "forensic"
-                            })
-                    else:
-                        # Fallback to dominant state for all images
-                        photo_classifications = [{
-                            "photo_id": f"photo_{i+1}",
-                            "classification": dominant_state + "_demo" if dominant_state in ["before", "after"] else "after_demo",
-                            "confidence": classification_data.get("analysis_confidence", 0.5),
-                            "primary_evidence": ["google_vision_analysis"],
-                            "supporting_details": classification_data.get("classification_reasoning", ""),
-                            "next_analysis_recommendation": "forensic"
-                        } for i in range(total_photos)]
-                    
-                    result = {
-                        "photo_classifications": photo_classifications,
-                        "overall_assessment": {
-                            "dominant_state": f"primarily_{dominant_state}" if dominant_state in ["before", "after"] else "primarily_after",
-                            "confidence_level": classification_data.get("analysis_confidence", 0.5),
-                            "recommended_workflow": classification_data.get("recommended_workflow", "single_stage_forensic")
-                        }
-                    }
-                
-                return result
-            except json.JSONDecodeError as parse_error:
-                # Try to extract first valid JSON object if there's extra data
-                if "Extra data" in str(parse_error):
-                    try:
-                        # Find the end of the first JSON object
-                        decoder = json.JSONDecoder()
-                        first_obj, idx = decoder.raw_decode(cleaned_response.strip())
-                        return first_obj
-                    except:
-                        pass
-                raise parse_error
+            return _Degraded(result) if degraded else result
             
         except json.JSONDecodeError as e:
             logger.error(f"Photo classification JSON parsing error: {e}")
             logger.error(f"Raw AI response: {response[:500]}...")
             # Fallback classification
-            return {
+            return _Degraded({
                 "photo_classifications": [
                     {
                         "photo_id": f"photo_{i+1}",
@@ -907,118 +1395,56 @@ async def _classify_photos(images: List[Dict], room_data: Dict, analysis_type: s
                     "confidence_level": 0.5,
                     "recommended_workflow": "single_stage_forensic"
                 }
-            }
+            })
     
     except Exception as e:
         logger.error(f"Photo classification error: {e}")
         raise
 
+@_cached_stage("before_inventory")
 async def _analyze_before_demo_inventory(images: List[Dict], room_data: Dict) -> Dict:
     """Stage 2: Analyze before-demo photos for comprehensive inventory"""
     try:
-        # Prepare context
-        room_context = f"Room type: {room_data.get('room_type', 'unknown')}. "
-        
-        # Format prompt
-        prompt = BEFORE_DEMO_INVENTORY_PROMPT.format(room_context=room_context)
-        
-        # Prepare messages for AI
-        messages = [{"role": "system", "content": prompt}]
-        
-        # Add images
-        image_contents = []
-        for img in images:
-            image_contents.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{img['base64_data']}",
-                    "detail": "high"
-                }
-            })
-        
-        messages.append({
-            "role": "user", 
-            "content": [
-                {"type": "text", "text": "Conduct comprehensive inventory of all existing elements."},
-                *image_contents
-            ]
-        })
+        prompt = _before_inventory_prompt(str(room_data.get('room_type', 'unknown')))
         
         # Extract prompt text and use ALL images for analysis  
         if images:
-            # Extract all base64 images
-            base64_images = [img['base64_data'] for img in images]
-            logger.info(f"🔍 Stage 2: Analyzing {len(base64_images)} before-demo images")
-            response = ai_service.analyze_multiple_images(base64_images, prompt)
+            logger.info(f"🔍 Stage 2: Analyzing {len(images)} before-demo images")
+            response = await _analyze_images_limited(images, prompt)
+            degraded = ai_service.is_mock_image_analysis(response)
             # Check for empty response
             if not response or response.strip() == "":
                 response = '{"analysis": "AI returned empty response"}'
+                degraded = True
         else:
             response = '{"analysis": "No images provided for analysis"}'
+            degraded = True
         
         # Parse response
         try:
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            elif cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            
-            result = json.loads(cleaned_response.strip())
-            return result
+            result = _parse_ai_json(response)
+            return _Degraded(result) if degraded else result
             
         except json.JSONDecodeError as e:
             logger.error(f"Before-demo inventory JSON parsing error: {e}")
-            return {"room_inventory": {}, "baseline_summary": {}}
+            return _Degraded({"room_inventory": {}, "baseline_summary": {}})
     
     except Exception as e:
         logger.error(f"Before-demo inventory error: {e}")
         raise
 
+@_cached_stage("after_forensics")
 async def _analyze_after_demo_forensics(images: List[Dict], room_data: Dict) -> Dict:
     """Stage 3: Forensic analysis of after-demo photos"""
     try:
-        # Prepare context
-        room_context = f"Room type: {room_data.get('room_type', 'unknown')}. "
-        
-        # Format prompt
-        prompt = AFTER_DEMO_ANALYSIS_PROMPT.format(room_context=room_context)
-        
-        # Prepare messages for AI
-        messages = [{"role": "system", "content": prompt}]
-        
-        # Add images
-        image_contents = []
-        for img in images:
-            image_contents.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{img['base64_data']}",
-                    "detail": "high"
-                }
-            })
-        
-        messages.append({
-            "role": "user", 
-            "content": [
-                {"type": "text", "text": "Conduct forensic analysis to detect removed elements and infer original state."},
-                *image_contents
-            ]
-        })
-        
         # Use multi-image analysis  
         if images:
-            # Create prompt that explicitly requests JSON format
-            json_instruction = "\n\nCRITICAL INSTRUCTION: You MUST respond ONLY with the JSON structure shown above. Do not include any explanatory text, comments, or narrative before or after the JSON. Start your response with '{' and end with '}'. The response must be valid, parseable JSON."
-            
-            # For classification, we need a simpler prompt
-            system_prompt = f"{prompt}{json_instruction}"
+            # Prompt that explicitly requests JSON format
+            system_prompt = _after_forensics_prompt(str(room_data.get('room_type', 'unknown')), json_only=True)
             
             # Analyze all images
-            base64_images = [img['base64_data'] for img in images]
-            response = ai_service.analyze_multiple_images(base64_images, system_prompt)
+            response = await _analyze_images_limited(images, system_prompt)
+            degraded = ai_service.is_mock_image_analysis(response)
             
             # Log raw AI response for debugging
             logger.info(f"🔍 After-demo forensics raw AI response (length: {len(response) if response else 0}): '{response[:500] if response else 'None'}{'...' if response and len(response) > 500 else ''}'")
@@ -1027,96 +1453,45 @@ async def _analyze_after_demo_forensics(images: List[Dict], room_data: Dict) ->
             if not response or response.strip() == "":
                 logger.warning("⚠️ After-demo forensics: AI returned empty response")
                 response = '{"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}}'
+                degraded = True
         else:
             response = '{"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}}'
+            degraded = True
         
         # Parse response
         try:
-            cleaned_response = response.strip()
-            
             # Check if response is empty after stripping
-            if not cleaned_response:
+            if not response.strip():
                 logger.warning("⚠️ After-demo forensics: Response is empty after stripping")
-                return {"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}}
+                return _Degraded({"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}})
             
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            elif cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
+            result = _parse_ai_json(response)
             
-            try:
-                result = json.loads(cleaned_response.strip())
+            # Google Vision is tried before the configured provider and answers in its own schema
+            if "demolition_analysis" in result and "forensic_analysis" not in result:
+                result = _google_forensics_to_canonical(result)
                 
-                # Handle different response formats from different AI providers
-                # Google Vision API might return different keys
-                if "demolition_analysis" in result and "forensic_analysis" not in result:
-                    # Convert Google Vision format to expected format
-                    demolished_elements = result.get("demolished_elements", [])
-                    detected_removed_elements = []
-                    
-                    for elem in demolished_elements:
-                        detected_removed_elements.append({
-                            "element_type": elem.get("original_element_type", "unknown"),
-                            "original_material": elem.get("inferred_material", "unknown"),
-                            "removal_evidence": [elem.get("removal_evidence", "evidence")],
-                            "confidence_level": elem.get("inference_confidence", 0.5),
-                            "detection_method": "google_vision_detection",
-                            "original_dimensions": elem.get("estimated_dimensions", {}),
-                            "original_location": elem.get("location", "unknown"),
-                            "area_affected": elem.get("estimated_area", 0),
-                            "removal_completeness": "complete",
-                            "replacement_indication": "likely_planned"
-                        })
-                    
-                    result = {
-                        "forensic_analysis": {
-                            "demolition_type": result.get("demolition_analysis", {}).get("demolition_scope", "selective"),
-                            "demolition_quality": result.get("demolition_analysis", {}).get("work_quality", "professional"),
-                            "work_sequence": result.get("demolition_analysis", {}).get("completion_status", "in_progress"),
-                            "safety_evidence": "adequate"
-                        },
-                        "detected_removed_elements": detected_removed_elements,
-                        "inference_summary": {
-                            "total_elements_removed": len(detected_removed_elements),
-                            "renovation_scope": result.get("demolition_analysis", {}).get("room_current_state", "partial"),
-                            "primary_removal_methods": ["professional_demolition"],
-                            "estimated_completion": 50
-                        }
-                    }
-                
-                return result
-            except json.JSONDecodeError as parse_error:
-                # Try to extract first valid JSON object if there's extra data
-                if "Extra data" in str(parse_error):
-                    try:
-                        # Find the end of the first JSON object
-                        decoder = json.JSONDecoder()
-                        first_obj, idx = decoder.raw_decode(cleaned_response.strip())
-                        return first_obj
-                    except:
-                        pass
-                raise parse_error
+            return _Degraded(result) if degraded else result
             
         except json.JSONDecodeError as e:
             logger.error(f"After-demo forensics JSON parsing error: {e}")
-            logger.error(f"Cleaned response was: '{cleaned_response[:200] if 'cleaned_response' in locals() else 'undefined'}{'...' if 'cleaned_response' in locals() and len(cleaned_response) > 200 else ''}'")
-            return {"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}}
+            logger.error(f"Raw AI response was: '{response[:200]}{'...' if len(response) > 200 else ''}'")
+            return _Degraded({"forensic_analysis": {}, "detected_removed_elements": [], "inference_summary": {}})
     
     except Exception as e:
         logger.error(f"After-demo forensics error: {e}")
         raise
 
+@_cached_stage("synthesis")
 async def _synthesize_demo_scope(before_inventory: Dict, after_analysis: Dict, room_context: Dict, classification: Dict) -> Dict:
     """Stage 4: Synthesize all analyses into final demolition scope"""
     try:
         # Prepare context
         context_str = f"Room type: {room_context.get('room_type', 'unknown')}. "
         
-        # Prepare inventory and analysis data
-        before_data = json.dumps(before_inventory) if before_inventory else "No before-demo inventory available"
-        after_data = json.dumps(after_analysis) if after_analysis else "No after-demo analysis available"
+        # Prepare inventory and analysis data as compact JSON, which also trims prompt tokens
+        before_data = _dumps(before_inventory) if before_inventory else "No before-demo inventory available"
+        after_data = _dumps(after_analysis) if after_analysis else "No after-demo analysis available"
         
         # Format prompt
         prompt = DEMO_SCOPE_SYNTHESIS_PROMPT.format(
@@ -1133,26 +1508,18 @@ async def _synthesize_demo_scope(before_inventory: Dict, after_analysis: Dict, r
         })
         
         # Call AI service for synthesis using LLM directly
-        if ai_service.ai_provider in ['openai', 'claude']:
-            llm_response = ai_service.llm.invoke(messages)
-            response = llm_response.content if hasattr(llm_response, 'content') else str(llm_response)
-        else:
-            response = ai_service.llm.invoke(prompt)
+        async with _ai_semaphore:
+            if ai_service.ai_provider in ['openai', 'claude']:
+                llm_response = await asyncio.to_thread(ai_service.llm.invoke, messages)
+                response = llm_response.content if hasattr(llm_response, 'content') else str(llm_response)
+            else:
+                response = await asyncio.to_thread(ai_service.llm.invoke, prompt)
         
         logger.info(f"Synthesis raw response length: {len(response)}")
         
         # Parse response
         try:
-            cleaned_response = response.strip()
-            # Remove markdown code blocks if present
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            elif cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            
-            result = json.loads(cleaned_response.strip())
+            result = _parse_ai_json(response)
             logger.info(f"Synthesis successfully parsed: {len(result.get('final_demolition_scope', []))} elements found")
             return result
             
@@ -1160,13 +1527,13 @@ async def _synthesize_demo_scope(before_inventory: Dict, after_analysis: Dict, r
             logger.error(f"Synthesis JSON parsing error: {e}")
             logger.error(f"Raw response: {response[:500]}...")
             # Return a default structure
-            return {
+            return _Degraded({
                 "synthesis_summary": {
                     "total_demolished_elements": 0,
                     "analysis_quality": "limited"
                 },
                 "final_demolition_scope": []
-            }
+            })
     
     except Exception as e:
         logger.error(f"Demo scope synthesis error: {e}")
@@ -1174,41 +1541,53 @@ async def _synthesize_demo_scope(before_inventory: Dict, after_analysis: Dict, r
 
 async def _store_multi_stage_analysis(analysis_id: str, session_id: str, room_context: Dict, images: List[Dict], 
                                     classification_result: Dict, stage2_result: Dict, stage3_result: Dict, final_result: Dict):
-    """Store multi-stage analysis results in database"""
+    """Store multi-stage analysis results in database
+    
+    The stage results can serialize to hundreds of KB, so the JSON encoding runs in the
+    worker thread together with the insert instead of on the event loop.
+    """
     try:
         # Store in demo_ai_analysis table with enhanced data
-        execute_insert(
-            query="""
-                INSERT INTO demo_ai_analysis (
-                    analysis_id, project_id, session_id, room_id,
-                    analysis_timestamp, model_version, prompt_version,
-                    images, ai_raw_response, ai_parsed_results,
-                    quality_score, is_verified, is_applied
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            params=(
-                analysis_id, session_id, session_id, room_context.get('room_id', 'unknown'),
-                datetime.utcnow().isoformat(), settings.openai_vision_model, "multi_stage_v1",
-                json.dumps([{
-                    "id": img["id"],
-                    "filename": img["filename"],
-                    "size": img["size"],
-                    "dimensions": img["dimensions"]
-                } for img in images]),
-                json.dumps({
-                    "classification": classification_result,
-                    "stage2_inventory": stage2_result,
-                    "stage3_forensics": stage3_result,
-                    "final_synthesis": final_result
-                }),
-                json.dumps(final_result.get("final_demolition_scope", [])),
-                final_result.get("synthesis_summary", {}).get("overall_confidence", 0.8),
-                False, False
-            )
+        await asyncio.to_thread(
+            _insert_multi_stage_analysis, analysis_id, session_id, room_context, images,
+            classification_result, stage2_result, stage3_result, final_result
         )
         
         logger.info(f"Multi-stage analysis stored: {analysis_id}")
         
     except Exception as e:
         logger.error(f"Failed to store multi-stage analysis: {e}")
-        # Don't raise - analysis can continue without storage
\ No newline at end of file
+        # Don't raise - analysis can continue without storage
+
+def _insert_multi_stage_analysis(analysis_id: str, session_id: str, room_context: Dict, images: List[Dict],
+                                 classification_result: Dict, stage2_result: Dict, stage3_result: Dict, final_result: Dict):
+    """Serialize and insert a multi-stage analysis row; run in a worker thread"""
+    execute_insert(
+        query="""
+            INSERT INTO demo_ai_analysis (
+                analysis_id, project_id, session_id, room_id,
+                analysis_timestamp, model_version, prompt_version,
+                images, ai_raw_response, ai_parsed_results,
+                quality_score, is_verified, is_applied
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        params=(
+            analysis_id, session_id, session_id, room_context.get('room_id', 'unknown'),
+            datetime.now(timezone.utc).isoformat(timespec="seconds"), settings.openai_vision_model, "multi_stage_v1",
+            _dumps([{
+                "id": img["id"],
+                "filename": img["filename"],
+                "size": img["size"],
+                "dimensions": img["dimensions"]
+            } for img in images]),
+            _dumps({
+                "classification": classification_result,
+                "stage2_inventory": stage2_result,
+                "stage3_forensics": stage3_result,
+                "final_synthesis": final_result
+            }),
+            _dumps(final_result.get("final_demolition_scope", [])),
+            final_result.get("synthesis_summary", {}).get("overall_confidence", 0.8),
+            False, False
+        )
+    )
\ No newline at end of file
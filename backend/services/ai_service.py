@@ -1,5 +1,14 @@
 import json
+import orjson
 import os
+import copy
+import functools
+import hashlib
+import re
+import numpy as np
+import threading
+from cachetools import TTLCache
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 from utils.prompts import MEASUREMENT_PROMPT, DEMO_SCOPE_PROMPT, WORK_SCOPE_PROMPT, TEXT_CLEANUP_PROMPT, MATERIAL_ANALYSIS_VISION_PROMPT, AREA_CALCULATION_PROMPT, BEFORE_AFTER_COMPARISON_PROMPT
@@ -8,6 +17,7 @@ import time
 from services.measurement_processor import measurement_processor
 from services.room_calculator import calculation_engine
 from config import settings
+from models.database import execute_query, execute_update
 
 # Import RAG service
 try:
@@ -20,13 +30,54 @@ except ImportError:
 # Load environment variables at module level
 load_dotenv()
 
+# Vision responses and parsed scopes are reused for identical inputs and prompts for this long
+AI_RESPONSE_CACHE_TTL_DAYS = 7
+
+# Attempts per vision provider call when it is rate limited or has a server error
+PROVIDER_MAX_ATTEMPTS = 3
+
+# Claude model answering vision requests
+CLAUDE_VISION_MODEL = "claude-3-sonnet-20240229"
+
+def _is_retryable_provider_error(error: BaseException) -> bool:
+    """Rate limits (429) and server errors (5xx) are worth retrying; other failures fall through to the next provider"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+@functools.lru_cache(maxsize=1)
+def _ollama_available() -> bool:
+    """Check once per process if a local Ollama server is available; OLLAMA_SKIP_PROBE skips the check"""
+    if os.getenv('OLLAMA_SKIP_PROBE'):
+        return False
+    try:
+        import requests
+        response = requests.get('http://localhost:11434/api/tags', timeout=2)
+        return response.status_code == 200
+    except:
+        return False
+
+# Line classifiers of the direct CSV parser; all match anywhere in the text
+_CSV_FLOOR_RE = re.compile(r'Ground Floor|1st Floor|2nd Floor')
+_CSV_HEADER_RE = re.compile(r'ROOM ATTRIBUTES|GROUND SURFACE|VOLUME', re.IGNORECASE)
+_CSV_ROOM_RE = re.compile(r'room|kitchen|bathroom|bedroom|living|hall|closet|laundry', re.IGNORECASE)
+
 class AIService:
     def __init__(self):
         self.llm = None
         self.mock_mode = False
         self.ai_provider = 'openai'
         self.progress_store = {}  # Store progress data for each session
-        self.vision_cache = {}  # Cache for Google Vision results
+        self.response_cache_stats = {  # Persistent AI response cache lookups by kind
+            'vision': {'hits': 0, 'misses': 0},
+            'parse': {'hits': 0, 'misses': 0}
+        }
+        self._chat_models = {}  # Vision/structuring chat clients reused across calls
+        self._http_client = None  # Keep-alive connection pool shared by the OpenAI chat clients
+        self._rag_analysis = None  # OpenAIService running RAG analyses on this service's text model
+        self._provider_slots = {  # Concurrent vision calls per provider
+            provider: threading.BoundedSemaphore(settings.ai_provider_max_inflight)
+            for provider in ('google', 'openai', 'claude')
+        }
         
         # Load AI model configurations from settings
         self.models = {
@@ -54,7 +105,7 @@ class AIService:
             return
         
         # PRIORITY 3: Development environment - try Ollama
-        if os.getenv('OLLAMA_HOST') or self._check_ollama_available():
+        if os.getenv('OLLAMA_HOST') or _ollama_available():
             logger.info("Development environment: Using Ollama as AI provider")
             self._init_ollama()
             return
@@ -125,15 +176,6 @@ class AIService:
             logger.error(f"Failed to initialize Ollama: {e}")
             logger.info("Falling back to mock mode")
     
-    def _check_ollama_available(self):
-        """Check if Ollama server is available"""
-        try:
-            import requests
-            response = requests.get('http://localhost:11434/api/tags', timeout=2)
-            return response.status_code == 200
-        except:
-            return False
-        
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """Parse JSON from AI response, handling common formatting issues"""
         try:
@@ -146,12 +188,12 @@ class AIService:
             
             if start_idx != -1 and end_idx != 0:
                 json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
+                return orjson.loads(json_str)
             else:
                 # If no JSON found, try parsing the whole response
-                return json.loads(response)
+                return orjson.loads(response)
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {e}")
             logger.error(f"Response was: {response}")
             # Return a basic structure as fallback
@@ -159,7 +201,7 @@ class AIService:
     
     def _parse_csv_directly(self, raw_data: str) -> Dict[str, Any]:
         """Direct CSV parsing without AI for large files"""
-        measurements = []
+        rooms = []  # (floor, room name, area); dimensions are estimated for all rooms at once
         lines = raw_data.split('\n')
         current_floor = None
         
@@ -172,43 +214,27 @@ class AIService:
                 
             try:
                 # Look for floor information
-                if 'Floor' in line and ('Ground Floor' in line or '1st Floor' in line or '2nd Floor' in line):
-                    current_floor = line.split(',')[0] if ',' in line else line
+                if _CSV_FLOOR_RE.search(line):
+                    current_floor = line.split(',', 1)[0]
                     logger.debug(f"Found floor: {current_floor}")
                 
-                # Look for room data in ROOM ATTRIBUTES section
-                if ',' in line and len(line.split(',')) >= 3:
-                    parts = [p.strip() for p in line.split(',')]
-                    room_name = parts[0]
+                # Look for room data in ROOM ATTRIBUTES section; only the first two columns are used
+                parts = line.split(',', 2)
+                if len(parts) >= 3:
+                    room_name = parts[0].strip()
                     
                     # Skip header lines
-                    if any(header in room_name.upper() for header in ['ROOM ATTRIBUTES', 'GROUND SURFACE', 'VOLUME']):
+                    if _CSV_HEADER_RE.search(room_name):
                         continue
                     
                     # Check if this looks like room data
-                    if any(word in room_name.lower() for word in ['room', 'kitchen', 'bathroom', 'bedroom', 'living', 'hall', 'closet', 'laundry']):
+                    if _CSV_ROOM_RE.search(room_name):
                         try:
                             # Try to extract square footage from second column
-                            area_str = parts[1].replace(' ', '') if len(parts) > 1 else '0'
+                            area_str = parts[1].strip().replace(' ', '')
                             area = float(area_str) if area_str.replace('.', '').isdigit() else 0
                             
-                            # Estimate dimensions from area (assuming rectangular room)
-                            if area > 0:
-                                # Assume length is 1.2 times width for rectangular rooms
-                                width = (area / 1.2) ** 0.5
-                                length = area / width
-                            else:
-                                length, width = 10.0, 10.0
-                            
-                            measurements.append({
-                                "elevation": current_floor or "1st Floor",
-                                "room": room_name,
-                                "dimensions": {
-                                    "length": round(length, 1),
-                                    "width": round(width, 1),
-                                    "height": 8.0
-                                }
-                            })
+                            rooms.append((current_floor or "1st Floor", room_name, area))
                             logger.debug(f"Added room: {room_name} ({area} sq ft)")
                             
                         except Exception as e:
@@ -219,6 +245,24 @@ class AIService:
                 logger.debug(f"Error processing line {i}: {e}")
                 continue
         
+        # Estimate dimensions from area (assuming rectangular rooms with length 1.2 times width);
+        # rooms without a usable area get 10 x 10
+        areas = np.array([area for _, _, area in rooms], dtype=np.float64)
+        widths = np.where(areas > 0, np.sqrt(np.maximum(areas, 0) / 1.2), 10.0)
+        lengths = np.where(areas > 0, areas / widths, 10.0)
+        measurements = [
+            {
+                "elevation": floor,
+                "room": room_name,
+                "dimensions": {
+                    "length": round(length, 1),
+                    "width": round(width, 1),
+                    "height": 8.0
+                }
+            }
+            for (floor, room_name, _), length, width in zip(rooms, lengths.tolist(), widths.tolist())
+        ]
+        
         if not measurements:
             # Fallback data from file analysis
             logger.warning("No rooms parsed, using fallback data")
@@ -454,6 +498,11 @@ class AIService:
         try:
             logger.info(f"Parsing demo scope with {self.ai_provider}: {input_text[:100]}...")
             
+            cache_key = self._parse_cache_key(DEMO_SCOPE_PROMPT.template, input_text)
+            cached = self._get_cached_response(cache_key, 'parse')
+            if cached is not None:
+                return orjson.loads(cached)
+            
             if self.ai_provider in ['openai', 'claude']:
                 parse_response = self.llm.invoke([{"role": "user", "content": DEMO_SCOPE_PROMPT.format(input_text=input_text)}])
                 response = parse_response.content if hasattr(parse_response, 'content') else str(parse_response)
@@ -478,6 +527,8 @@ class AIService:
                         }
                     ]
                 }
+            else:
+                self._store_response(cache_key, orjson.dumps(parsed_data).decode())
             
             return parsed_data
             
@@ -534,6 +585,11 @@ class AIService:
         try:
             logger.info(f"Parsing work scope with {self.ai_provider}: {input_data[:100]}...")
             
+            cache_key = self._parse_cache_key(WORK_SCOPE_PROMPT.template, input_data)
+            cached = self._get_cached_response(cache_key, 'parse')
+            if cached is not None:
+                return orjson.loads(cached)
+            
             if self.ai_provider in ['openai', 'claude']:
                 parse_response = self.llm.invoke([{"role": "user", "content": WORK_SCOPE_PROMPT.format(input_data=input_data)}])
                 response = parse_response.content if hasattr(parse_response, 'content') else str(parse_response)
@@ -583,6 +639,8 @@ class AIService:
                         }
                     ]
                 }
+            else:
+                self._store_response(cache_key, orjson.dumps(parsed_data).decode())
             
             return parsed_data
             
@@ -650,13 +708,82 @@ class AIService:
             logger.info("Using mock mode for image analysis")
             return self._get_mock_image_analysis()
         
+        cache_key = self._vision_cache_key(base64_images, prompt)
+        cached = self._get_cached_response(cache_key, 'vision')
+        if cached is not None:
+            return cached
+        
+        response = self._analyze_multiple_images_uncached(base64_images, prompt)
+        if response is None:
+            return self._get_mock_image_analysis()
+        
+        self._store_response(cache_key, response)
+        return response
+    
+    def is_mock_image_analysis(self, response: Optional[str]) -> bool:
+        """Whether a vision answer is the mock analysis served in mock mode or when every provider failed"""
+        return response == self._get_mock_image_analysis()
+    
+    def _vision_cache_key(self, base64_images: List[str], prompt: str) -> str:
+        """Key a vision request by provider, the models the provider chain calls, prompt and every image in order
+        
+        OpenAI and Google Vision answers come from the advanced model (Google's structured
+        through the text model), Claude's from CLAUDE_VISION_MODEL.
+        """
+        models = f"{self.models['advanced']}\0{self.models['text']}\0{CLAUDE_VISION_MODEL}"
+        digest = hashlib.sha256(f"{self.ai_provider}\0{models}\0{prompt}".encode())
+        for base64_image in base64_images:
+            digest.update(b'\0')
+            digest.update(base64_image.encode())
+        return digest.hexdigest()
+    
+    def _parse_cache_key(self, template: str, text: str) -> str:
+        """Key a parse request by provider, text model, prompt template and input text"""
+        model = getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', '')
+        digest = hashlib.sha256(f"{self.ai_provider}\0{model}\0{template}\0".encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+    
+    def _get_cached_response(self, cache_key: str, kind: str) -> Optional[str]:
+        """Return a stored AI response younger than AI_RESPONSE_CACHE_TTL_DAYS, if any"""
+        try:
+            rows = execute_query(
+                """SELECT response FROM ai_response_cache
+                   WHERE cache_key = ? AND created_at > datetime('now', ?)""",
+                (cache_key, f"-{AI_RESPONSE_CACHE_TTL_DAYS} days")
+            )
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {e}")
+            return None
+        
+        stats = self.response_cache_stats[kind]
+        stats['hits' if rows else 'misses'] += 1
+        logger.info(f"{kind.capitalize()} response cache {'hit' if rows else 'miss'} "
+                    f"(hit ratio {stats['hits'] / (stats['hits'] + stats['misses']):.0%})")
+        return rows[0]['response'] if rows else None
+    
+    def _store_response(self, cache_key: str, response: str):
+        """Remember a provider's response; mock fallbacks and default structures are never stored"""
+        try:
+            execute_update(
+                """INSERT INTO ai_response_cache (cache_key, response) VALUES (?, ?)
+                   ON CONFLICT(cache_key) DO UPDATE SET
+                       response = excluded.response,
+                       created_at = CURRENT_TIMESTAMP""",
+                (cache_key, response)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache AI response: {e}")
+    
+    def _analyze_multiple_images_uncached(self, base64_images: List[str], prompt: str) -> Optional[str]:
+        """Run the provider chain; returns None when every provider failed or refused"""
         try:
             response = None
             
             # Try Google Vision first
             logger.info("Trying Google Vision API first")
             try:
-                response = self._analyze_images_google_vision(base64_images, prompt)
+                response = self._call_provider('google', self._analyze_images_google_vision, base64_images, prompt)
                 if response and not self._is_refusal_response(response):
                     logger.info("Google Vision API successfully analyzed the images")
                     return response
@@ -668,36 +795,50 @@ class AIService:
             # Then try configured provider
             if self.ai_provider == "openai":
                 logger.info("Trying OpenAI as fallback")
-                response = self._analyze_images_openai(base64_images, prompt)
+                response = self._call_provider('openai', self._analyze_images_openai, base64_images, prompt)
                 
                 # Check if OpenAI refused to analyze
                 if response and not self._is_refusal_response(response):
                     return response
                 elif hasattr(self, '_analyze_images_claude'):
                     logger.warning("OpenAI refused to analyze images, trying Claude fallback")
-                    response = self._analyze_images_claude(base64_images, prompt)
+                    response = self._call_provider('claude', self._analyze_images_claude, base64_images, prompt)
                     
             elif self.ai_provider == "claude":
                 logger.info("Trying Claude as fallback") 
-                response = self._analyze_images_claude(base64_images, prompt)
+                response = self._call_provider('claude', self._analyze_images_claude, base64_images, prompt)
                 
                 # Check if Claude refused to analyze
                 if response and not self._is_refusal_response(response):
                     return response
                 else:
                     logger.warning("Claude refused to analyze images, trying OpenAI fallback")
-                    response = self._analyze_images_openai(base64_images, prompt)
+                    response = self._call_provider('openai', self._analyze_images_openai, base64_images, prompt)
             
             # If still no valid response, use mock
             if not response or self._is_refusal_response(response):
                 logger.warning(f"All AI providers failed or refused, using mock response")
-                return self._get_mock_image_analysis()
+                return None
                 
             return response
                 
         except Exception as e:
             logger.error(f"Multi-image analysis failed: {str(e)}")
-            return self._get_mock_image_analysis()
+            return None
+    
+    def _call_provider(self, provider: str, analyze: Any, base64_images: List[str], prompt: str) -> str:
+        """Call one vision provider within its concurrency slots, backing off on rate limits and server errors"""
+        for attempt in Retrying(
+            retry=retry_if_exception(_is_retryable_provider_error),
+            stop=stop_after_attempt(PROVIDER_MAX_ATTEMPTS),
+            wait=wait_exponential(multiplier=1, max=10),
+            reraise=True
+        ):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    logger.warning(f"Retrying {provider} vision call (attempt {attempt.retry_state.attempt_number})")
+                with self._provider_slots[provider]:
+                    return analyze(base64_images, prompt)
     
     def _is_refusal_response(self, response: str) -> bool:
         """Check if the response is a refusal from AI"""
@@ -706,12 +847,69 @@ class AIService:
         refusal_patterns = ["I'm sorry", "can't assist", "cannot analyze", "unable to analyze", "cannot process"]
         return any(pattern.lower() in response.lower() for pattern in refusal_patterns)
     
+    def _get_http_client(self):
+        """Get the pooled HTTP client, so provider calls reuse open TLS connections"""
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=120
+            )
+        return self._http_client
+    
+    def _get_openai_chat_model(self, model: str, max_tokens: Optional[int] = None):
+        """Get a cached ChatOpenAI client for a model and token limit"""
+        key = ('openai', model, max_tokens)
+        chat_model = self._chat_models.get(key)
+        if chat_model is None:
+            from langchain_openai import ChatOpenAI
+            chat_model = self._chat_models[key] = ChatOpenAI(
+                model=model,
+                api_key=os.getenv('OPENAI_API_KEY'),
+                max_tokens=max_tokens,
+                temperature=0.1,
+                http_client=self._get_http_client()
+            )
+        return chat_model
+    
+    def _get_claude_chat_model(self, model: str, max_tokens: int):
+        """Get a cached ChatAnthropic client, which keeps its own connection pool"""
+        key = ('claude', model, max_tokens)
+        chat_model = self._chat_models.get(key)
+        if chat_model is None:
+            from langchain_anthropic import ChatAnthropic
+            chat_model = self._chat_models[key] = ChatAnthropic(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=0.1
+            )
+        return chat_model
+    
+    def close(self):
+        """Close the pooled provider connections; called on shutdown"""
+        self._chat_models.clear()
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+    
+    @property
+    def rag_analysis(self) -> "OpenAIService":
+        """The OpenAIService that runs RAG-enhanced analyses with this service's text model"""
+        if self._rag_analysis is None:
+            self._rag_analysis = OpenAIService(text_service=self)
+        return self._rag_analysis
+    
+    async def analyze_with_rag(self, *args, **kwargs) -> Dict[str, Any]:
+        """RAG-enhanced analysis; see OpenAIService.analyze_with_rag"""
+        return await self.rag_analysis.analyze_with_rag(*args, **kwargs)
+    
+    async def analyze_before_after_comparison(self, *args, **kwargs) -> Dict[str, Any]:
+        """RAG-enhanced before/after comparison; see OpenAIService.analyze_before_after_comparison"""
+        return await self.rag_analysis.analyze_before_after_comparison(*args, **kwargs)
+    
     def _analyze_images_openai(self, base64_images: List[str], prompt: str) -> str:
         """Analyze multiple images using OpenAI GPT-4 Vision"""
         try:
-            from langchain_openai import ChatOpenAI
-            import os
-            
             # Get API key
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key:
@@ -719,12 +917,7 @@ class AIService:
                 raise ValueError("OPENAI_API_KEY is required for image analysis")
             
             # Use GPT-4o for image analysis (latest vision model)
-            vision_model = ChatOpenAI(
-                model=self.models['advanced'],
-                api_key=api_key,
-                max_tokens=1000,
-                temperature=0.1
-            )
+            vision_model = self._get_openai_chat_model(self.models['advanced'], max_tokens=1000)
             
             # Create content with all images
             content = [{"type": "text", "text": prompt}]
@@ -756,14 +949,8 @@ class AIService:
     def _analyze_images_claude(self, base64_images: List[str], prompt: str) -> str:
         """Analyze multiple images using Claude Vision"""
         try:
-            from langchain_anthropic import ChatAnthropic
-            
             # Use Claude 3 with vision capabilities
-            vision_model = ChatAnthropic(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                temperature=0.1
-            )
+            vision_model = self._get_claude_chat_model(CLAUDE_VISION_MODEL, max_tokens=1000)
             
             # Create content with all images
             content = [{"type": "text", "text": prompt}]
@@ -799,15 +986,6 @@ class AIService:
             from google.cloud import vision
             import base64
             import io
-            import hashlib
-            
-            # Create cache key from images and prompt
-            cache_key = hashlib.md5((str(base64_images[:1]) + prompt[:100]).encode()).hexdigest()
-            
-            # Check cache first
-            if cache_key in self.vision_cache:
-                logger.info("🔍 Using cached Google Vision results")
-                return self.vision_cache[cache_key]
             
             # Initialize Google Vision client
             # Note: Requires GOOGLE_APPLICATION_CREDENTIALS environment variable
@@ -907,10 +1085,7 @@ IMPORTANT: You must analyze ALL {len(base64_images)} images provided below. Each
             if os.getenv('OPENAI_API_KEY'):
                 try:
                     # Use OpenAI with both the Vision results AND the images
-                    result = self._analyze_with_openai_vision(combined_prompt, base64_images)
-                    # Cache the result
-                    self.vision_cache[cache_key] = result
-                    return result
+                    return self._analyze_with_openai_vision(combined_prompt, base64_images)
                 except Exception as e:
                     logger.warning(f"OpenAI vision analysis failed: {e}")
                     # Fallback to text-only analysis
@@ -977,15 +1152,8 @@ IMPORTANT: You must analyze ALL {len(base64_images)} images provided below. Each
     def _analyze_with_openai_vision(self, prompt: str, base64_images: List[str]) -> str:
         """Use OpenAI vision model to analyze images with Google Vision context"""
         try:
-            from langchain_openai import ChatOpenAI
-            
             # Use vision model
-            vision_model = ChatOpenAI(
-                model=self.models['advanced'],
-                api_key=os.getenv('OPENAI_API_KEY'),
-                max_tokens=2000,
-                temperature=0.1
-            )
+            vision_model = self._get_openai_chat_model(self.models['advanced'], max_tokens=2000)
             
             # Create content with text and all images
             content = [{"type": "text", "text": prompt}]
@@ -1012,14 +1180,8 @@ IMPORTANT: You must analyze ALL {len(base64_images)} images provided below. Each
     def _analyze_with_openai_text(self, prompt: str) -> str:
         """Use OpenAI text model to structure the response"""
         try:
-            from langchain_openai import ChatOpenAI
-            
             # Use text model for structuring
-            llm = ChatOpenAI(
-                model=self.models['text'],
-                api_key=os.getenv('OPENAI_API_KEY'),
-                temperature=0.1
-            )
+            llm = self._get_openai_chat_model(self.models['text'])
             
             response = llm.invoke(prompt)
             return response.content
@@ -1162,11 +1324,20 @@ IMPORTANT: You must analyze ALL {len(base64_images)} images provided below. Each
 
 # OpenAI Service for image analysis
 class OpenAIService:
-    def __init__(self):
+    # Same lenient JSON extraction as the text service
+    _parse_json_response = AIService._parse_json_response
+    
+    def __init__(self, text_service: Optional[AIService] = None):
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             logger.warning("OPENAI_API_KEY not found - image analysis will fail")
         
+        # RAG analyses run on the text model of the AIService this instance serves
+        self.llm = text_service.llm if text_service else None
+        self.ai_provider = text_service.ai_provider if text_service else 'openai'
+        self.mock_mode = text_service.mock_mode if text_service else not self.api_key
+        self.rag_context_cache = TTLCache(maxsize=256, ttl=3600)  # Retrieved RAG context per room context key
+        
         # Load AI model configurations from settings
         self.models = {
             'text': settings.openai_text_model,
@@ -1187,10 +1358,14 @@ class OpenAIService:
         context_data: Dict[str, Any] = None,
         document_type: str = 'demo-scope',
         rag_enabled: bool = True,
-        confidence_threshold: float = 0.7
+        confidence_threshold: float = 0.7,
+        ctx_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Enhanced AI analysis with RAG context integration
+        
+        When ctx_key identifies a stable room context, the retrieved RAG context is
+        reused across calls instead of repeating the vector search
         """
         try:
             start_time = time.time()
@@ -1202,12 +1377,21 @@ class OpenAIService:
                 rag_query = self._build_rag_query(context_data)
                 logger.info(f"RAG query: {rag_query}")
                 
-                rag_context = await rag_service.get_rag_context(
-                    query=rag_query,
-                    document_type=document_type,
-                    top_k=5,
-                    similarity_threshold=confidence_threshold
-                )
+                cache_key = (ctx_key, rag_query, document_type, confidence_threshold)
+                cached_context = self.rag_context_cache.get(cache_key) if ctx_key else None
+                if cached_context is not None:
+                    rag_context = copy.deepcopy(cached_context)
+                    logger.info(f"Reusing cached RAG context for {ctx_key}")
+                else:
+                    rag_context = await rag_service.get_rag_context(
+                        query=rag_query,
+                        document_type=document_type,
+                        top_k=5,
+                        similarity_threshold=confidence_threshold
+                    )
+                    # Empty results are not cached; retrieval errors also come back empty
+                    if ctx_key and rag_context:
+                        self.rag_context_cache[cache_key] = copy.deepcopy(rag_context)
                 
                 if rag_context:
                     enhanced_prompt = await rag_service.create_enhanced_prompt(
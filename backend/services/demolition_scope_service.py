@@ -2,6 +2,7 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 from models.database import execute_query
+from services.measurement_store import measurement_store
 
 logger = logging.getLogger(__name__)
 
@@ -38,13 +39,10 @@ class DemolitionScopeService:
     def _get_measurement_data(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get measurement data from database"""
         try:
-            measurements = execute_query(
-                "SELECT parsed_json FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-                (session_id,)
-            )
+            latest = measurement_store.get_latest(session_id)
             
-            if measurements and measurements[0]['parsed_json']:
-                return json.loads(measurements[0]['parsed_json'])
+            if latest:
+                return latest[1]
             
             return None
             
@@ -1,11 +1,19 @@
 import os
 import uuid
-from typing import Tuple, Optional
+import shutil
+import asyncio
+import hashlib
+import tempfile
+from typing import Any, BinaryIO, Callable, Tuple, Optional
 
 class FileService:
-    def __init__(self, upload_dir: str = "uploads"):
+    def __init__(self, upload_dir: str = "uploads", output_dir: str = "outputs", image_dir: str = "uploads/images"):
         self.upload_dir = upload_dir
+        self.output_dir = output_dir
+        self.image_dir = image_dir
         os.makedirs(upload_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(image_dir, exist_ok=True)
     
     def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
         """Save uploaded file and return the saved path"""
@@ -19,6 +27,81 @@ class FileService:
             
         return file_path
     
+    async def save_upload_stream(self, upload, filename: str, chunk_size: int = 1 << 20) -> Tuple[str, int]:
+        """Stream an uploaded file to disk in chunks and return the saved path and size"""
+        file_ext = os.path.splitext(filename or "")[1]
+        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        file_path = os.path.join(self.upload_dir, unique_filename)
+        
+        size = 0
+        with open(file_path, 'wb') as f:
+            try:
+                while chunk := await upload.read(chunk_size):
+                    await asyncio.to_thread(f.write, chunk)
+                    size += len(chunk)
+            except BaseException:
+                # A failed read or write, or a cancelled request, must not leave a partial upload behind
+                f.close()
+                os.remove(file_path)
+                raise
+        
+        return file_path, size
+    
+    def store_image(self, file: BinaryIO, ext: str) -> str:
+        """Store an image under its content hash and return the stored path
+        
+        Identical uploads share one file, so re-uploading a photo costs only the hash.
+        """
+        file.seek(0)
+        digest = hashlib.file_digest(file, 'sha256').hexdigest()
+        file_path = os.path.join(self.image_dir, f"{digest}{ext.lower()}")
+        
+        if not os.path.exists(file_path):
+            file.seek(0)
+            self._store_atomically(file_path, lambda f: shutil.copyfileobj(file, f))
+        
+        return file_path
+    
+    def store_image_bytes(self, content: bytes, ext: str) -> str:
+        """Store in-memory image bytes under their content hash and return the stored path"""
+        digest = hashlib.sha256(content).hexdigest()
+        file_path = os.path.join(self.image_dir, f"{digest}{ext.lower()}")
+        
+        if not os.path.exists(file_path):
+            self._store_atomically(file_path, lambda f: f.write(content))
+        
+        return file_path
+    
+    def _store_atomically(self, file_path: str, write: Callable[[BinaryIO], Any]):
+        """Write a content-addressed image through a temporary file renamed into place
+        
+        The hashed path only ever holds a complete file: a failed write never leaves a
+        truncated one that later uploads would take as stored, and concurrent stores of
+        the same image each rename a full copy.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.image_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    
+    def read_file(self, file_path: str) -> bytes:
+        """Read a saved file's content"""
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    def output_path(self, filename: str) -> str:
+        """Get the path of a generated file in the output directory"""
+        return os.path.join(self.output_dir, filename)
+    
+    def write_file(self, file_path: str, content: bytes):
+        """Write content to a file, replacing it if it exists"""
+        with open(file_path, 'wb') as f:
+            f.write(content)
+    
     def process_csv_content(self, csv_content: bytes) -> str:
         """Process CSV file content and return as text"""
         try:
@@ -1,7 +1,8 @@
-import json
+import orjson
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from models.database import execute_query
+from services.measurement_store import measurement_store
 from models.schemas import (
     CompanyInfo, FinalOpeningData, FinalMeasurementData, 
     FinalWorkScopeData, FinalDemoScopeData, FinalRoomData, 
@@ -18,7 +19,9 @@ class FinalEstimateService:
         try:
             # Get session info
             sessions = execute_query(
-                "SELECT * FROM pre_estimate_sessions WHERE session_id = ?",
+                """SELECT jobsite, occupancy, company_name, company_address, company_city,
+                          company_state, company_zip, company_phone, company_email
+                   FROM pre_estimate_sessions WHERE session_id = ?""",
                 (session_id,)
             )
             
@@ -75,13 +78,10 @@ class FinalEstimateService:
     @staticmethod
     def _get_measurement_data(session_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get latest measurement data for session"""
-        measurements = execute_query(
-            "SELECT parsed_json FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
-            (session_id,)
-        )
+        latest = measurement_store.get_latest(session_id)
         
-        if measurements and measurements[0]['parsed_json']:
-            return json.loads(measurements[0]['parsed_json'])
+        if latest:
+            return latest[1]
         return None
     
     @staticmethod
@@ -93,7 +93,7 @@ class FinalEstimateService:
         )
         
         if demo_scopes and demo_scopes[0]['parsed_json']:
-            return json.loads(demo_scopes[0]['parsed_json'])
+            return orjson.loads(demo_scopes[0]['parsed_json'])
         return None
     
     @staticmethod
@@ -105,7 +105,7 @@ class FinalEstimateService:
         )
         
         if work_scopes and work_scopes[0]['parsed_json']:
-            return json.loads(work_scopes[0]['parsed_json'])
+            return orjson.loads(work_scopes[0]['parsed_json'])
         return None
     
     @staticmethod
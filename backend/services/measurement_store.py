@@ -0,0 +1,161 @@
+"""
+Measurement data persistence
+Stores parsed measurement uploads and the per-room edits made on top of them
+"""
+
+import threading
+import orjson
+import zstandard
+from typing import Dict, List, Any, Optional, Tuple
+from models.database import execute_query, execute_insert, execute_update, transaction
+
+# parsed_json is stored zstd-compressed; (de)compressor objects are not thread-safe
+ZSTD_LEVEL = 3
+_zstd = threading.local()
+
+
+def _compress_json(value: Any) -> bytes:
+    """Serialize a value to zstd-compressed JSON"""
+    compressor = getattr(_zstd, 'compressor', None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(orjson.dumps(value))
+
+
+def _load_parsed_json(row: Any) -> Any:
+    """Load a measurement row's parsed data from the compressed or legacy plain column"""
+    if row['parsed_json_zst'] is None:
+        return orjson.loads(row['parsed_json'])
+    decompressor = getattr(_zstd, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return orjson.loads(decompressor.decompress(row['parsed_json_zst']))
+
+
+class MeasurementStore:
+    """Reads and writes measurement_data records merged with their room overrides"""
+    
+    @staticmethod
+    def get_latest(session_id: str) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """Get (record id, locations) of the latest measurement data with room overrides applied"""
+        measurements = execute_query(
+            """SELECT id, parsed_json, parsed_json_zst FROM measurement_data
+               WHERE session_id = ? ORDER BY created_at DESC LIMIT 1""",
+            (session_id,)
+        )
+        
+        if not measurements or (measurements[0]['parsed_json_zst'] is None and not measurements[0]['parsed_json']):
+            return None
+        
+        measurement_id = measurements[0]['id']
+        locations = _load_parsed_json(measurements[0])
+        
+        overrides = execute_query(
+            """SELECT location, room_name, openings_json, measurements_json
+               FROM room_overrides WHERE measurement_id = ?""",
+            (measurement_id,)
+        )
+        if overrides:
+            MeasurementStore._apply_overrides(locations, overrides)
+        
+        return measurement_id, locations
+    
+    @staticmethod
+    def index_rooms(locations: List[Dict[str, Any]]) -> Dict[Tuple[Any, Any], Dict[str, Any]]:
+        """Map (location, room name) to the room dict; the first room with a given key wins"""
+        rooms_by_key = {}
+        for location in locations:
+            for room in location.get('rooms', []):
+                rooms_by_key.setdefault((location.get('location'), room.get('name')), room)
+        return rooms_by_key
+    
+    @staticmethod
+    def _apply_overrides(locations: List[Dict[str, Any]], overrides: List[Any]):
+        """Merge room override rows into the parsed locations in place"""
+        rooms_by_key = MeasurementStore.index_rooms(locations)
+        
+        for override in overrides:
+            room = rooms_by_key.get((override['location'], override['room_name']))
+            if room is None:
+                continue
+            room['openings'] = orjson.loads(override['openings_json'])
+            room['measurements'] = orjson.loads(override['measurements_json'])
+    
+    @staticmethod
+    def insert(session_id: str, file_name: str, file_type: str, raw_data: str,
+               locations: List[Dict[str, Any]]) -> int:
+        """Store a newly parsed measurement upload and return its record id"""
+        return execute_insert(
+            """INSERT INTO measurement_data
+               (session_id, file_name, file_type, raw_data, parsed_json_zst)
+               VALUES (?, ?, ?, ?, ?)""",
+            (session_id, file_name, file_type, raw_data, _compress_json(locations))
+        )
+    
+    @staticmethod
+    def save_room(session_id: str, measurement_id: int, location: str, room_name: str,
+                  openings: List[Dict[str, Any]], measurements: Dict[str, Any]):
+        """Persist one room's openings and measurements without rewriting the whole record"""
+        execute_update(
+            """INSERT INTO room_overrides
+               (session_id, measurement_id, location, room_name, openings_json, measurements_json)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(measurement_id, location, room_name) DO UPDATE SET
+                   openings_json = excluded.openings_json,
+                   measurements_json = excluded.measurements_json,
+                   updated_at = CURRENT_TIMESTAMP""",
+            (session_id, measurement_id, location, room_name,
+             orjson.dumps(openings).decode(), orjson.dumps(measurements).decode())
+        )
+    
+    @staticmethod
+    def save_rooms(session_id: str, measurement_id: int,
+                   rooms: List[Tuple[str, str, List[Dict[str, Any]], Dict[str, Any]]]):
+        """Persist several (location, room name, openings, measurements) edits in one transaction"""
+        with transaction():
+            for location, room_name, openings, measurements in rooms:
+                MeasurementStore.save_room(session_id, measurement_id, location, room_name, openings, measurements)
+    
+    @staticmethod
+    def replace(session_id: str, measurement_id: int, locations: List[Dict[str, Any]]):
+        """Overwrite a measurement record with fully edited data, superseding its room overrides"""
+        with transaction():
+            execute_update(
+                "UPDATE measurement_data SET parsed_json = NULL, parsed_json_zst = ? WHERE session_id = ? AND id = ?",
+                (_compress_json(locations), session_id, measurement_id)
+            )
+            execute_update(
+                "DELETE FROM room_overrides WHERE measurement_id = ?",
+                (measurement_id,)
+            )
+    
+    @staticmethod
+    def replace_latest(session_id: str, locations: List[Dict[str, Any]]) -> Optional[int]:
+        """Overwrite the session's latest measurement record; returns its id, or None if there is none"""
+        with transaction():
+            measurements = execute_query(
+                "SELECT id FROM measurement_data WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
+                (session_id,)
+            )
+            if not measurements:
+                return None
+            
+            measurement_id = measurements[0]['id']
+            MeasurementStore.replace(session_id, measurement_id, locations)
+            return measurement_id
+    
+    @staticmethod
+    def delete_session(session_id: str):
+        """Delete all measurement records and room overrides of a session"""
+        with transaction():
+            execute_update(
+                "DELETE FROM room_overrides WHERE session_id = ?",
+                (session_id,)
+            )
+            execute_update(
+                "DELETE FROM measurement_data WHERE session_id = ?",
+                (session_id,)
+            )
+
+# Global measurement store instance
+measurement_store = MeasurementStore()
@@ -1,8 +1,8 @@
 import logging
+import mmap
 import re
 from typing import Dict, List, Any, Optional
 from PyPDF2 import PdfReader
-from io import BytesIO
 from utils.logger import logger
 from utils.prompts import PDF_MEASUREMENT_EXTRACTION_PROMPT
 
@@ -12,14 +12,16 @@ class PDFParserService:
     def __init__(self):
         pass
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_reader = PdfReader(BytesIO(pdf_content))
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            # Map the file instead of reading it so large uploads are paged in on demand
+            with open(pdf_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                pdf_reader = PdfReader(mapped)
+                text = ""
+                
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             
             logger.info(f"Extracted text from PDF: {len(text)} characters")
             return text
@@ -449,11 +451,11 @@ class PDFParserService:
         
         return size
     
-    def process_pdf_for_measurements(self, pdf_content: bytes) -> List[Dict[str, Any]]:
+    def process_pdf_for_measurements(self, pdf_path: str) -> List[Dict[str, Any]]:
         """Complete PDF processing pipeline for room measurements"""
         try:
             # Extract text from PDF
-            pdf_text = self.extract_text_from_pdf(pdf_content)
+            pdf_text = self.extract_text_from_pdf(pdf_path)
             
             # Extract room measurements using pattern matching
             rooms = self.extract_room_measurements(pdf_text)